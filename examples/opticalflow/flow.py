@@ -17,5 +17,5 @@ with Database() as db:
 
     output_table = db.run(job, pipeline_instances_per_node=1, force=True)
 
-    vid_flows = [flow[0] for _, flow in output_table.load(['flow'], rows=[0])]
+    vid_flows = output_table.load_array('flow', rows=[0])
     np.save('flows.npy', vid_flows)
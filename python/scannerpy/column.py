@@ -2,10 +2,12 @@ import struct
 import cv2
 import math
 from common import *
-from stdlib import parsers
+from stdlib import parsers, video
 from subprocess import Popen, PIPE
-import tempfile
 import os
+import mmap
+from itertools import izip
+from functools import partial
 
 class Column:
     """
@@ -21,6 +23,7 @@ class Column:
         self._video_descriptor = video_descriptor
         # Used for overriding name
         self._name = None
+        self._item_video_descriptors = {}
 
     def name(self):
         if self._name:
@@ -33,100 +36,439 @@ class Column:
     def id(self):
         return self._descriptor.id
 
-    def _load_output_file(self, item_id, rows, fn=None):
-        assert len(rows) > 0
+    def _read_item_file(self, path):
+        if self._db.config.storage_type == 'posix':
+            # Map the file instead of reading it into a string so that rows
+            # can be handed out as views into the page cache
+            try:
+                with open(path, 'rb') as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        return ''
+                    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (IOError, OSError):
+                raise ScannerException('Path {} does not exist'.format(path))
+        try:
+            return self._storage.read(path)
+        except UserWarning:
+            raise ScannerException('Path {} does not exist'.format(path))
 
-        metadata_path = '{}/tables/{}/{}_{}_metadata.bin'.format(
+    def _item_path(self, item_id, suffix=''):
+        return '{}/tables/{}/{}_{}{}.bin'.format(
             self._db_path, self._table._descriptor.id,
-            self._descriptor.id, item_id)
+            self._descriptor.id, item_id, suffix)
+
+    def _read_row_offsets(self, item_id):
+        metadata_path = self._item_path(item_id, '_metadata')
         try:
             metadata_contents = self._storage.read(metadata_path)
         except UserWarning:
             raise ScannerException('Path {} does not exist'.format(
                 metadata_path))
 
-        path = '{}/tables/{}/{}_{}.bin'.format(
-            self._db_path, self._table._descriptor.id,
-            self._descriptor.id, item_id)
-        try:
-            contents = self._storage.read(path)
-        except UserWarning:
-            raise ScannerException('Path {} does not exist'.format(path))
-
+        # The metadata file is a sequence of blocks, each a row count followed
+        # by that many row lengths, so only the block headers are walked here
         lens = []
-        total_rows = 0
         i = 0
         while i < len(metadata_contents):
             (num_rows,) = struct.unpack("=Q", metadata_contents[i:i+8])
-            total_rows += num_rows
-            i += 8
-            for fi in range(num_rows):
-                (buf_len,) = struct.unpack("=Q", metadata_contents[i:i+8])
-                lens.append(buf_len)
-                i += 8
-
-        start_pos = None
-        pos = 0
-        rows = rows if len(rows) > 0 else range(total_rows)
-        for fi in range(total_rows):
-            old_pos = pos
-            pos += lens[fi]
-            if start_pos is None:
-                start_pos = old_pos
-
-        rows_idx = 0
-        i = start_pos
-        for j, buf_len in enumerate(lens):
-            if rows_idx < len(rows) and j == rows[rows_idx]:
-                buf = contents[i:i+buf_len]
-                if fn is not None:
-                    yield fn(buf, self._db.protobufs)
-                else:
-                    yield buf
-                rows_idx += 1
-            i += buf_len
-
-    def _load(self, fn=None, rows=None):
+            lens.append(np.frombuffer(metadata_contents, dtype=np.dtype('=u8'),
+                                      count=num_rows, offset=i+8))
+            i += 8 * (num_rows + 1)
+
+        offsets = np.zeros(sum(len(l) for l in lens) + 1, dtype=np.int64)
+        if len(lens) > 0:
+            np.cumsum(np.concatenate(lens), out=offsets[1:])
+        return offsets
+
+    def _read_item_ranges(self, path, spans):
+        if self._db.config.storage_type == 'posix':
+            try:
+                with open(path, 'rb') as f:
+                    bufs = []
+                    for start, size in spans:
+                        f.seek(int(start))
+                        bufs.append(f.read(int(size)))
+                    return bufs
+            except (IOError, OSError):
+                raise ScannerException('Path {} does not exist'.format(path))
+        # StorageBackend can only read whole files, so slice the item instead
+        contents = self._read_item_file(path)
+        return [buffer(contents, int(start), int(size)) for start, size in spans]
+
+    def _read_item_rows(self, item_id, rows, load_sparsity_threshold=8):
+        offsets = self._table._row_offsets(self, item_id)
+        path = self._item_path(item_id)
+
+        # If the requested rows are sufficiently sparse, only read the byte
+        # ranges that cover them (merging rows which are close together).
+        # Otherwise, read the entire item and slice out the requested rows.
+        num_rows = len(offsets) - 1
+        if num_rows // len(rows) >= load_sparsity_threshold:
+            span_rows = np.unique(rows)
+            splits = np.flatnonzero(
+                np.diff(span_rows) > load_sparsity_threshold) + 1
+            span_starts = span_rows[np.concatenate(([0], splits))]
+            span_ends = span_rows[np.concatenate(
+                (splits - 1, [len(span_rows) - 1]))] + 1
+            byte_starts = offsets[span_starts]
+            bufs = self._read_item_ranges(
+                path, zip(byte_starts, offsets[span_ends] - byte_starts))
+            row_spans = np.searchsorted(span_starts, rows, side='right') - 1
+        else:
+            bufs = [self._read_item_file(path)]
+            byte_starts = np.zeros(1, dtype=np.int64)
+            row_spans = np.zeros(len(rows), dtype=np.int64)
+
+        # (contents, byte offset, byte length) for each requested row
+        return [(bufs[span], int(offsets[r] - byte_starts[span]),
+                 int(offsets[r + 1] - offsets[r]))
+                for r, span in izip(rows, row_spans)]
+
+    def _item_rows(self, rows=None):
         table_descriptor = self._table._descriptor
-        total_rows = table_descriptor.end_rows[-1]
+        end_rows = np.array(table_descriptor.end_rows, dtype=np.int64)
+        start_rows = np.concatenate(([0], end_rows[:-1]))
+        total_rows = end_rows[-1]
 
-        # Integer divide, round up
-        num_items = len(table_descriptor.end_rows)
-        bufs = []
-        input_rows = list(range(self._table.num_rows()))
-        assert len(input_rows) == total_rows
-        i = 0
-        rows_so_far = 0
-        rows_idx = 0
-        rows = range(total_rows) if rows is None else rows
-        prev = 0
-        for item_id in range(num_items):
-            start_row = prev
-            end_row = table_descriptor.end_rows[item_id]
-            item_rows = end_row - start_row
-            prev = end_row
-            select_rows = []
-            while rows_idx < len(rows):
-                r = rows[rows_idx]
-                if r >= start_row and r < end_row:
-                    select_rows.append(r - start_row)
-                    rows_idx += 1
-                else:
-                    break
-            if select_rows:
-                for output in self._load_output_file(item_id, select_rows, fn):
-                    yield (input_rows[i], output)
-                    i += 1
-            rows_so_far += item_rows
+        if rows is None:
+            rows = np.arange(total_rows, dtype=np.int64)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return []
+        if rows.min() < 0 or rows.max() >= total_rows:
+            raise ScannerException('Requested rows out of range for table {} '
+                                   'with {} rows'.format(self._table.name(),
+                                                         total_rows))
+
+        # Group consecutive requested rows by the item that contains them
+        item_ids = np.searchsorted(end_rows, rows, side='right')
+        splits = np.flatnonzero(np.diff(item_ids)) + 1
+        split_items = item_ids[np.concatenate(([0], splits))]
+        return [(int(item_id), item_rows, item_rows - start_rows[item_id])
+                for item_id, item_rows in izip(split_items,
+                                               np.split(rows, splits))]
+
+    def _load(self, fn=None, rows=None, views=False,
+              load_sparsity_threshold=8, prefetch=2):
+        item_rows = self._item_rows(rows)
+        reads = [partial(self._read_item_rows, item_id, local_rows,
+                         load_sparsity_threshold)
+                 for item_id, _, local_rows in item_rows]
+        # Read upcoming items in the background while the current one is
+        # being consumed
+        item_bufs = prefetch_results(self._db._io_pool(), reads, prefetch)
+        for (_, rows, _), bufs in izip(item_rows, item_bufs):
+            for r, output in izip(rows, self._parse_rows(bufs, fn, views)):
+                yield (int(r), output)
+
+    def _parse_rows(self, bufs, fn=None, views=False):
+        for contents, i, buf_len in bufs:
+            if views:
+                buf = buffer(contents, i, buf_len)
+            else:
+                buf = contents[i:i+buf_len]
+            if fn is not None:
+                yield fn(buf, self._db.protobufs)
+            else:
+                yield buf
+
+    def _row_parser(self, fn=None):
+        if self._descriptor.type == self._db.protobufs.Video:
+            # Raw frames are parsed with np.frombuffer, so they can be
+            # returned as read-only views without copying each row
+            parser_fn = parsers.raw_frame_gen(self._video_descriptor.height,
+                                              self._video_descriptor.width,
+                                              self._video_descriptor.channels,
+                                              self._frame_dtype())
+            return parser_fn, True
+        else:
+            return fn, False
+
+    def _frame_dtype(self):
+        frame_type = self._video_descriptor.frame_type
+        if frame_type == self._db.protobufs.U8:
+            return np.uint8
+        elif frame_type == self._db.protobufs.F32:
+            return np.float32
+        elif frame_type == self._db.protobufs.F64:
+            return np.float64
+        else:
+            raise ScannerException('Unsupported frame type {}'
+                                   .format(frame_type))
+
+    def _is_compressed_video(self):
+        return (self._descriptor.type == self._db.protobufs.Video and
+                self._video_descriptor.codec_type ==
+                self._db.protobufs.VideoDescriptor.H264)
+
+    def _item_video_descriptor(self, item_id):
+        if item_id == 0:
+            return self._video_descriptor
+        if item_id not in self._item_video_descriptors:
+            self._item_video_descriptors[item_id] = self._db._load_descriptor(
+                self._db.protobufs.VideoDescriptor,
+                'tables/{:d}/{:d}_{:d}_video_metadata.bin'.format(
+                    self._table._descriptor.id, self._descriptor.id, item_id))
+        return self._item_video_descriptors[item_id]
+
+    def _keyframe_index(self, item_id):
+        desc = self._item_video_descriptor(item_id)
+        positions = np.array(desc.keyframe_positions, dtype=np.int64)
+        offsets = np.array(desc.keyframe_byte_offsets, dtype=np.int64)
+
+        # Offset the keyframes of separately encoded videos in this item so
+        # that they look like one stream (same as read_video_index)
+        k = 0
+        frame_offset = 0
+        byte_offset = 0
+        for v in range(desc.num_encoded_videos):
+            n = desc.keyframes_per_video[v]
+            positions[k:k+n] += frame_offset
+            offsets[k:k+n] += byte_offset
+            k += n
+            frame_offset += desc.frames_per_video[v]
+            byte_offset += desc.size_per_video[v]
+
+        # Place total frames and size at the end so every keyframe has an end
+        return (np.append(positions, desc.frames),
+                np.append(offsets, byte_offset))
+
+    def _keyframe_rows(self):
+        """
+        Returns the table rows of every keyframe in this column, in order.
+        """
+        if not self._is_compressed_video():
+            raise ScannerException(
+                'Column {} is not an h264 video column'.format(self.name()))
+        self._table._need_descriptor()
+        rows = []
+        start_row = 0
+        for item_id, end_row in enumerate(self._table._descriptor.end_rows):
+            positions, _ = self._keyframe_index(item_id)
+            rows.append(positions[:-1] + start_row)
+            start_row = end_row
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(rows)
+
+    def _load_decoded(self, rows=None, prefetch=2):
+        # Split the requested rows into ascending runs that lie in adjacent
+        # GOPs, each of which is read and decoded in one pass
+        runs = []
+        for item_id, item_rows, local_rows in self._item_rows(rows):
+            positions, offsets = self._keyframe_index(item_id)
+            gops = np.searchsorted(positions, local_rows, side='right') - 1
+            breaks = np.flatnonzero((np.diff(local_rows) <= 0) |
+                                    (np.diff(gops) > 1)) + 1
+            for run in np.split(np.arange(len(local_rows)), breaks):
+                start_gop = gops[run[0]]
+                end_gop = gops[run[-1]] + 1
+                runs.append((item_id, item_rows[run], local_rows[run],
+                             positions[start_gop], offsets[start_gop],
+                             offsets[end_gop] - offsets[start_gop]))
+
+        reads = [partial(self._read_item_ranges, self._item_path(item_id),
+                         [(start, size)])
+                 for item_id, _, _, _, start, size in runs]
+        run_bufs = prefetch_results(self._db._io_pool(), reads, prefetch)
+        for (item_id, run_rows, local_rows, first_frame, _, _), bufs in \
+            izip(runs, run_bufs):
+            desc = self._item_video_descriptor(item_id)
+            frames = video.decode_h264(bufs[0], desc.width, desc.height)
+            idx = 0
+            for frame_idx, frame in enumerate(frames, first_frame):
+                if frame_idx == local_rows[idx]:
+                    yield (int(run_rows[idx]), frame)
+                    idx += 1
+                    if idx == len(local_rows):
+                        frames.close()
+                        break
+            if idx < len(local_rows):
+                raise ScannerException('Failed to decode row {} of column {}'
+                                       .format(run_rows[idx], self.name()))
+
+    def _load_png_dump(self, rows=None, prefetch=2):
+        db = self._db
+        table_name = self._table.name()
+        if rows is None:
+            rows = np.arange(self._table.num_rows(), dtype=np.int64)
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+
+        cache = db._load_png_dump_cache()
+        cache.clock += 1
+
+        # Find which of the existing dumps of this table hold each requested
+        # row. Dumps older than the table itself are stale.
+        owners = np.full(len(rows), -1, dtype=np.int64)
+        positions = np.zeros(len(rows), dtype=np.int64)
+        dumps = []
+        stale = []
+        for dump in cache.dumps:
+            if dump.table_name != table_name:
+                continue
+            if not db.has_table(dump.dump_table_name):
+                stale.append(dump)
+                continue
+            dump_table = db.table(dump.dump_table_name)
+            dump_table._need_descriptor()
+            if (dump_table._descriptor.timestamp <=
+                self._table._descriptor.timestamp):
+                stale.append(dump)
+                continue
+            dump_rows = np.array(dump.rows, dtype=np.int64)
+            pos = np.searchsorted(dump_rows, rows)
+            hit = ((owners == -1) & (pos < len(dump_rows)) &
+                   (dump_rows[np.minimum(pos, len(dump_rows) - 1)] == rows))
+            owners[hit] = len(dumps)
+            positions[hit] = pos[hit]
+            dumps.append((dump, dump_table))
+
+        # Only dump the rows that no existing dump covers
+        missing = np.unique(rows[owners == -1])
+        if len(missing) > 0:
+            dump_table_name = db._png_dump_prefix.format(table_name,
+                                                         cache.next_id)
+            cache.next_id += 1
+            if len(missing) == self._table.num_rows():
+                frame = self._table.as_op().all()
+            else:
+                frame = self._table.as_op().gather(missing.tolist())
+            img = db.ops.ImageEncoder(frame = frame)
+            job = Job(columns = [img], name = dump_table_name)
+            [dump_table] = db.run([job], force=True, show_progress=False)
+            img_column = dump_table.columns('img')
+            dump = cache.dumps.add()
+            dump.table_name = table_name
+            dump.dump_table_name = dump_table_name
+            dump.rows.extend(missing.tolist())
+            dump.size = sum(
+                int(img_column._read_row_offsets(item_id)[-1])
+                for item_id in range(len(dump_table._descriptor.end_rows)))
+            hit = owners == -1
+            owners[hit] = len(dumps)
+            positions[hit] = np.searchsorted(missing, rows[hit])
+            dumps.append((dump, dump_table))
+
+        for dump, _ in dumps:
+            dump.last_used = cache.clock
+
+        # Evict least recently used dumps (never ones used by this load) until
+        # the cache fits in its storage budget
+        evict = set(d.dump_table_name for d in stale)
+        total_size = sum(d.size for d in cache.dumps
+                         if d.dump_table_name not in evict)
+        for d in sorted(cache.dumps, key=lambda d: d.last_used):
+            if total_size <= db._png_dump_budget:
+                break
+            if d.dump_table_name in evict or d.last_used == cache.clock:
+                continue
+            evict.add(d.dump_table_name)
+            total_size -= d.size
+        for i in reversed(range(len(cache.dumps))):
+            if cache.dumps[i].dump_table_name in evict:
+                del cache.dumps[i]
+        db._delete_png_dumps(list(evict))
+        db._save_png_dump_cache(cache)
+
+        return self._load_png_dump_rows(rows, [t for _, t in dumps], owners,
+                                        positions, prefetch)
+
+    def _load_png_dump_rows(self, rows, dump_tables, owners, positions,
+                            prefetch):
+        def parse(buf, protobufs):
+            return parsers.image([buf], protobufs)
+
+        if len(rows) == 0:
+            return
+        splits = np.flatnonzero(np.diff(owners)) + 1
+        for run_rows, run_owners, run_positions in izip(
+                np.split(rows, splits), np.split(owners, splits),
+                np.split(positions, splits)):
+            img_column = dump_tables[run_owners[0]].columns('img')
+            outputs = img_column._load(fn=parse, rows=run_positions,
+                                       prefetch=prefetch)
+            for r, (_, img) in izip(run_rows, outputs):
+                yield (int(r), img)
+
+    def _load_array(self, rows=None, out=None, dtype=None,
+                    load_sparsity_threshold=8, prefetch=2):
+        if self._is_compressed_video():
+            raise ScannerException('Column {} is h264-compressed and can not '
+                                   'be loaded as an array. Use load instead.'
+                                   .format(self.name()))
+        elif self._descriptor.type == self._db.protobufs.Video:
+            dtype = np.dtype(self._frame_dtype())
+            row_shape = (self._video_descriptor.height,
+                         self._video_descriptor.width,
+                         self._video_descriptor.channels)
+        else:
+            if dtype is None and out is None:
+                raise ScannerException('A dtype must be specified to load '
+                                       'non-video column {} as an array'
+                                       .format(self.name()))
+            dtype = np.dtype(out.dtype if dtype is None else dtype)
+            row_shape = None
+
+        item_rows = self._item_rows(rows)
+        num_rows = sum(len(r) for _, r, _ in item_rows)
+        if out is not None:
+            if len(out) != num_rows:
+                raise ScannerException('Output array has {} rows but {} rows '
+                                       'were requested'.format(len(out),
+                                                               num_rows))
+            if row_shape is not None and out.shape[1:] != row_shape:
+                raise ScannerException('Output array rows have shape {} but '
+                                       'column {} has shape {}'.format(
+                                           out.shape[1:], self.name(),
+                                           row_shape))
+            row_shape = out.shape[1:]
+
+        reads = [partial(self._read_item_rows, item_id, local_rows,
+                         load_sparsity_threshold)
+                 for item_id, _, local_rows in item_rows]
+        item_bufs = prefetch_results(self._db._io_pool(), reads, prefetch)
+        k = 0
+        for bufs in item_bufs:
+            for contents, i, buf_len in bufs:
+                if out is None:
+                    # Non-video rows are flat arrays of the requested dtype,
+                    # sized by the first row
+                    row_shape = row_shape or (buf_len // dtype.itemsize,)
+                    out = np.empty((num_rows,) + row_shape, dtype=dtype)
+                if buf_len != out[k].nbytes:
+                    raise ScannerException('Row of {} bytes in column {} does '
+                                           'not fit output row of {} bytes'
+                                           .format(buf_len, self.name(),
+                                                   out[k].nbytes))
+                out[k] = np.frombuffer(contents, dtype=out.dtype,
+                                       count=out[k].size,
+                                       offset=i).reshape(row_shape)
+                k += 1
+        if out is None:
+            out = np.empty((0,) + (row_shape or (0,)), dtype=dtype)
+        return out
 
     # TODO(wcrichto): don't show progress bar when running decode png
-    def load(self, fn=None, rows=None):
+    def load(self, fn=None, rows=None, load_sparsity_threshold=8, prefetch=2,
+             local_decode=True):
         """
         Loads the results of a Scanner computation into Python.
 
         Kwargs:
             fn: Optional function to apply to the binary blobs as they are read
                 in.
+            rows: Optional list of row indices to load.
+            load_sparsity_threshold: If an item has at least this many rows
+                                     per requested row, only the byte ranges
+                                     of the requested rows are read.
+            prefetch: Number of items to read ahead of the one being
+                      consumed, using the database's I/O thread pool.
+            local_decode: If true, h264 video columns are decoded in this
+                          process with ffmpeg, reading only the GOPs that
+                          contain the requested rows. Otherwise, a job is
+                          run to dump the frames as images.
 
         Returns:
             Generator that yields either a numpy array for frame columns or
@@ -134,88 +476,170 @@ class Column:
             `fn`).
         """
 
+        if self._is_compressed_video() and local_decode:
+            return self._load_decoded(rows=rows, prefetch=prefetch)
         # If the column is a video, then dump the requested frames to disk as
         # PNGs and return the decoded PNGs
-        if (self._descriptor.type == self._db.protobufs.Video and
-            self._video_descriptor.codec_type ==
-            self._db.protobufs.VideoDescriptor.H264):
-            png_table_name = self._db._png_dump_prefix.format(self._table.name())
-            if self._db.has_table(png_table_name):
-                png_table = self._db.table(png_table_name)
-                if rows is None and \
-                   png_table.num_rows() == self._table.num_rows() and \
-                   png_table._descriptor.timestamp > \
-                   self._table._descriptor.timestamp:
-                    return png_table.load(['img'], parsers.image)
-            pair = [(self._table.name(), png_table_name)]
-            if rows is None:
-                frame = self._table.as_op().all()
-            else:
-                frame = self._table.as_op().gather(rows)
-            img = self._db.ops.ImageEncoder(frame = frame)
-            job = Job(columns = [img], name = png_table_name)
-            [out_tbl] = self._db.run([job], force=True, show_progress=False)
-            return out_tbl.load(['img'], parsers.image)
-        elif self._descriptor.type == self._db.protobufs.Video:
-            frame_type = self._video_descriptor.frame_type
-            if frame_type == self._db.protobufs.U8:
-                dtype = np.uint8
-            elif frame_type == self._db.protobufs.F32:
-                dtype = np.float32
-            elif frame_type == self._db.protobufs.F64:
-                dtype = np.float64
-            parser_fn = parsers.raw_frame_gen(self._video_descriptor.height,
-                                              self._video_descriptor.width,
-                                              self._video_descriptor.channels,
-                                              dtype)
-            return self._load(fn=parser_fn, rows=rows)
+        elif self._is_compressed_video():
+            return self._load_png_dump(rows=rows, prefetch=prefetch)
         else:
-            return self._load(fn, rows=rows)
+            parser_fn, views = self._row_parser(fn)
+            return self._load(fn=parser_fn, rows=rows, views=views,
+                              load_sparsity_threshold=load_sparsity_threshold,
+                              prefetch=prefetch)
 
-    def save_mp4(self, output_name, fps=None, scale=None):
-        if not (self._descriptor.type == self._db.protobufs.Video and
-                self._video_descriptor.codec_type ==
-                self._db.protobufs.VideoDescriptor.H264):
+    def _fps(self):
+        return 1.0/(self._video_descriptor.time_base_num /
+                    float(self._video_descriptor.time_base_denom))
+
+    def save_mp4(self, output_name, fps=None, scale=None, prefetch=4):
+        """
+        Saves an h264-compressed video column as `output_name`.mp4.
+
+        The stored h264 streams are remuxed without re-encoding unless a
+        `scale` is given.
+
+        Kwargs:
+            fps: Frame rate of the output, by default the column's.
+            scale: Optional (width, height) to resize the video to.
+            prefetch: Number of items to read ahead of the one being written.
+        """
+        if not self._is_compressed_video():
             raise ScannerException('Attempted to save a non-h264-compressed '
                                    'column as an mp4. Try compressing the '
                                    'column first by saving the output as '
                                    'an RGB24 frame')
         num_items = len(self._table._descriptor.end_rows)
 
-        paths = ['{}/tables/{:d}/{:d}_{:d}.bin'.format(
-            self._db._db_path,
-            self._table._descriptor.id, self._descriptor.id, item_id)
-                          for item_id in range(num_items)]
-        temp_paths = []
-        for _ in range(len(paths)):
-            fd, p = tempfile.mkstemp()
-            os.close(fd)
-            temp_paths.append(p)
-        # Copy all files locally before calling ffmpeg
-        for in_path, temp_path in zip(paths, temp_paths):
-            with open(temp_path, 'w') as f:
-                f.write(self._storage.read(in_path))
-
-        files = '|'.join(temp_paths)
-
-        vid_fps = (fps or
-                   (1.0/(self._video_descriptor.time_base_num /
-                         float(self._video_descriptor.time_base_denom))))
-
-        args = ''
+        vid_fps = fps or self._fps()
+
         if scale:
-            args += '-filter:v "scale={:d}x{:d}" '.format(scale[0], scale[1])
-
-        cmd = (
-            'ffmpeg -y '
-            '-r {fps:f} ' # set the input fps
-            '-i "concat:{input_files:s}" ' # concatenate the h264 files
-            '-c:v libx264 '
-            '-filter:v "setpts=N" ' # h264 does not have pts' in it
-            '{extra_args:s}'
-            '{output_name:s}.mp4'.format(
-                input_files = files,
-                fps = vid_fps,
-                extra_args = args,
-                output_name=output_name))
-        Popen(cmd, shell=True).wait()
+            # h264 does not have pts' in it
+            codec_args = ['-c:v', 'libx264',
+                          '-filter:v', 'setpts=N,scale={:d}x{:d}'.format(
+                              scale[0], scale[1])]
+        else:
+            codec_args = ['-c:v', 'copy']
+
+        cmd = (['ffmpeg', '-y',
+                '-r', '{:f}'.format(vid_fps), # set the input fps
+                '-f', 'h264', '-i', 'pipe:0'] +
+               codec_args +
+               ['{:s}.mp4'.format(output_name)])
+        proc = Popen(cmd, stdin=PIPE)
+
+        # Stream the items into ffmpeg in order while upcoming ones are read
+        reads = [partial(self._read_item_file, self._item_path(item_id))
+                 for item_id in range(num_items)]
+
+        def packets():
+            for contents in prefetch_results(self._db._io_pool(), reads,
+                                             prefetch):
+                for packet in video.annexb_packets(contents):
+                    yield packet
+
+        # If ffmpeg exits early, writing to it fails with a broken pipe
+        write_failed = False
+        try:
+            for packet in packets():
+                try:
+                    proc.stdin.write(packet)
+                except (IOError, OSError):
+                    write_failed = True
+                    break
+        finally:
+            try:
+                proc.stdin.close()
+            except (IOError, OSError):
+                write_failed = True
+            proc.wait()
+        if write_failed or proc.returncode != 0:
+            raise ScannerException('ffmpeg failed to save {}.mp4 (exit code {})'
+                                   .format(output_name, proc.returncode))
+
+    def _export_segment(self, path, item_id, start, size, start_time, fps):
+        contents = self._read_item_ranges(self._item_path(item_id),
+                                          [(start, size)])[0]
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+               '-r', '{:f}'.format(fps),
+               '-f', 'h264', '-i', 'pipe:0',
+               '-c:v', 'copy',
+               # Keep timestamps continuous across segments
+               '-output_ts_offset', '{:f}'.format(start_time),
+               '-f', 'mpegts', path]
+        proc = Popen(cmd, stdin=PIPE)
+        proc.communicate(''.join(video.annexb_packets(contents)))
+        if proc.returncode != 0:
+            raise ScannerException('ffmpeg failed to write segment {}'
+                                   .format(path))
+
+    def export_segments(self, output_dir, format='hls', segment_duration=6.0,
+                        fps=None):
+        """
+        Exports an h264-compressed video column as a segmented stream for
+        playback over HTTP.
+
+        Segments are cut at keyframes of the stored h264 streams and remuxed
+        in parallel without re-encoding.
+
+        Args:
+            output_dir: Directory to write the playlist and segments to.
+
+        Kwargs:
+            format: Streaming format. Only 'hls' is currently supported.
+            segment_duration: Minimum duration in seconds of each segment.
+            fps: Frame rate of the output, by default the column's.
+
+        Returns:
+            Path to the playlist file.
+        """
+        if not self._is_compressed_video():
+            raise ScannerException('Attempted to export a non-h264-compressed '
+                                   'column as segments. Try compressing the '
+                                   'column first.')
+        if format != 'hls':
+            raise ScannerException('Unsupported segment format {}'
+                                   .format(format))
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+
+        vid_fps = fps or self._fps()
+        target_frames = max(1, int(round(segment_duration * vid_fps)))
+
+        # Group the GOPs of each item into segments of at least target_frames
+        segments = []
+        frames_so_far = 0
+        num_items = len(self._table._descriptor.end_rows)
+        for item_id in range(num_items):
+            positions, offsets = self._keyframe_index(item_id)
+            start = 0
+            for k in range(1, len(positions)):
+                num_frames = positions[k] - positions[start]
+                if num_frames >= target_frames or k == len(positions) - 1:
+                    segments.append((
+                        'segment_{:05d}.ts'.format(len(segments)), item_id,
+                        offsets[start], offsets[k] - offsets[start],
+                        frames_so_far / vid_fps, num_frames / vid_fps))
+                    frames_so_far += num_frames
+                    start = k
+
+        def export(segment):
+            name, item_id, start, size, start_time, _ = segment
+            self._export_segment(os.path.join(output_dir, name), item_id,
+                                 start, size, start_time, vid_fps)
+        self._db._io_pool().map(export, segments)
+
+        playlist_path = os.path.join(output_dir, 'playlist.m3u8')
+        with open(playlist_path, 'w') as f:
+            f.write('#EXTM3U\n')
+            f.write('#EXT-X-VERSION:3\n')
+            f.write('#EXT-X-PLAYLIST-TYPE:VOD\n')
+            f.write('#EXT-X-TARGETDURATION:{:d}\n'.format(
+                int(math.ceil(max([d for _, _, _, _, _, d in segments] or
+                                  [0])))))
+            f.write('#EXT-X-MEDIA-SEQUENCE:0\n')
+            for name, _, _, _, _, duration in segments:
+                f.write('#EXTINF:{:f},\n'.format(duration))
+                f.write('{}\n'.format(name))
+            f.write('#EXT-X-ENDLIST\n')
+        return playlist_path
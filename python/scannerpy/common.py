@@ -1,13 +1,31 @@
 import logging as log
 import numpy as np
 import enum
-from collections import defaultdict
+from collections import defaultdict, deque
 
 
 class ScannerException(Exception):
     pass
 
 
+def prefetch_results(pool, fns, window):
+    """
+    Runs each function in `fns` on `pool`, keeping up to `window` of them
+    running ahead of the consumer, and yields their results in order.
+    """
+    if window <= 0:
+        for fn in fns:
+            yield fn()
+        return
+    pending = deque()
+    for fn in fns:
+        pending.append(pool.apply_async(fn))
+        if len(pending) > window:
+            yield pending.popleft().get()
+    while len(pending) > 0:
+        yield pending.popleft().get()
+
+
 class DeviceType(enum.Enum):
     """ Enum for specifying where an Op should run. """
     CPU = 0
@@ -42,6 +42,7 @@ class Config(object):
             else:
                 storage = config['storage']
                 self.db_path = str(storage['db_path'])
+            self.storage_type = str(config['storage']['type'])
             storage_config = self._make_storage_config(config)
 
             self.master_address = 'localhost'
@@ -11,13 +11,15 @@ import struct
 import signal
 import copy
 import collections
+import hashlib
 
 from timeit import default_timer as now
 from multiprocessing import Process, Queue
 from subprocess import Popen, PIPE
 from random import choice
 from string import ascii_uppercase
-from threading import Thread
+from threading import Thread, Lock
+from multiprocessing.pool import ThreadPool
 
 from common import *
 from profiler import Profiler
@@ -31,6 +33,9 @@ from protobuf_generator import ProtobufGenerator
 
 from storehousepy import StorageConfig, StorageBackend
 
+# Most bytes of tasks sent to the master in one message of a job submission
+JOB_CHUNK_SIZE = 2 * 1024 * 1024
+
 def start_master(port=None, config=None, config_path=None, block=False, watchdog=True):
     """
     Start a master server instance on this node.
@@ -104,6 +109,89 @@ def start_worker(master_address, machine_params=None, port=None, config=None,
     return result
 
 
+class JobFuture:
+    """
+    Handle to a job submitted with Database.run_async.
+    """
+
+    def __init__(self, db, job_name, finish_fn):
+        self._db = db
+        self._job_name = job_name
+        self._finish_fn = finish_fn
+        self._status = None
+        self._output = None
+        self._lock = Lock()
+        if job_name is None:
+            # Nothing needed to run, so the job is already done
+            self._status = db.protobufs.JobStatus(finished=True)
+            self._status.result.success = True
+            self._output = finish_fn()
+
+    def _job_id(self):
+        job_id = self._db.protobufs.JobId()
+        job_id.job_name = self._job_name
+        return job_id
+
+    def progress(self):
+        """
+        Returns the JobStatus of the job, with whether it finished, the number
+        of tasks done out of the total and the rows processed per second.
+        """
+        if self._status is not None:
+            return self._status
+        try:
+            return next(self._db._master.GetJobStatus(self._job_id()))
+        except grpc.RpcError as e:
+            raise ScannerException(e)
+
+    def done(self):
+        return self.progress().finished
+
+    def result(self):
+        """
+        Blocks until the job finishes.
+
+        Returns:
+            The output of the job, as returned by Database.run.
+        """
+        with self._lock:
+            if self._status is None:
+                # Block on the master's progress updates until the job
+                # finishes
+                status = None
+                try:
+                    for status in self._db._master.GetJobStatus(
+                            self._job_id()):
+                        if status.finished:
+                            break
+                except grpc.RpcError as e:
+                    raise ScannerException(e)
+                if status is None or not status.finished:
+                    raise ScannerException(
+                        'Master stopped before the job finished')
+                if status.result.success:
+                    self._output = self._finish_fn()
+                self._status = status
+            if not self._status.result.success:
+                raise ScannerException(self._status.result.msg)
+            return self._output
+
+    def cancel(self):
+        """
+        Cancels the job. If the job is already running, the workers drop
+        their work items in flight and the partial outputs are discarded.
+
+        Returns:
+            True if the job was cancelled, False if it had already finished.
+        """
+        if self._status is not None:
+            return False
+        try:
+            return self._db._master.CancelJob(self._job_id()).success
+        except grpc.RpcError as e:
+            raise ScannerException(e)
+
+
 class Database:
     """
     Entrypoint for all Scanner operations.
@@ -116,7 +204,8 @@ class Database:
 
     def __init__(self, master=None, workers=None,
                  config_path=None, config=None,
-                 debug=None, start_cluster=True):
+                 debug=None, start_cluster=True, io_threads=8,
+                 png_dump_budget='4G'):
         """
         Initializes a Scanner database.
 
@@ -128,6 +217,11 @@ class Database:
                          assumed to be `~/.scanner.toml`.
             config: A scanner Config object. If specified, config_path is
                     ignored.
+            io_threads: Number of threads used to read tables from storage
+                        when loading them into Python.
+            png_dump_budget: Storage size (e.g. '4G') above which the least
+                             recently used frame dumps made by
+                             Column.load(local_decode=False) are deleted.
 
         Returns:
             A database instance.
@@ -151,7 +245,10 @@ class Database:
         self._db_path = self.config.db_path
         self._storage = self.config.storage
         self._cached_db_metadata = None
-        self._png_dump_prefix = '__png_dump_{:s}'
+        self._png_dump_prefix = '__png_dump_{:s}_{:d}'
+        self._png_dump_budget = self._parse_size_string(png_dump_budget)
+        self._io_threads = io_threads
+        self._io_thread_pool = None
 
         self.ops = OpGenerator(self)
         self.protobufs = ProtobufGenerator(self.config)
@@ -287,6 +384,11 @@ class Database:
                 self._table_name[table.name] = i
         return self._cached_db_metadata
 
+    def _io_pool(self):
+        if self._io_thread_pool is None:
+            self._io_thread_pool = ThreadPool(self._io_threads)
+        return self._io_thread_pool
+
     def _connect_to_worker(self, address):
         channel = grpc.insecure_channel(
             address,
@@ -588,6 +690,38 @@ class Database:
     def _update_collections(self):
         self._save_descriptor(self._collections, 'pydb/descriptor.bin')
 
+    def _load_png_dump_cache(self):
+        path = 'pydb/png_dump_cache.bin'
+        info = self._storage.get_file_info('{}/{}'.format(self._db_path, path))
+        if not info.file_exists:
+            return self.protobufs.PngDumpCacheDescriptor()
+        return self._load_descriptor(self.protobufs.PngDumpCacheDescriptor,
+                                     path)
+
+    def _save_png_dump_cache(self, cache):
+        self._save_descriptor(cache, 'pydb/png_dump_cache.bin')
+
+    def _delete_png_dumps(self, names):
+        # Dumps only exist as a cache, so their files are removed as well
+        names = [n for n in names if self.has_table(n)]
+        paths = []
+        for name in names:
+            table = self.table(name)
+            table._need_descriptor()
+            for c in table._descriptor.columns:
+                for item_id in range(len(table._descriptor.end_rows)):
+                    for suffix in ['', '_metadata']:
+                        paths.append('{}/tables/{}/{}_{}{}.bin'.format(
+                            self._db_path, table.id(), c.id, item_id, suffix))
+            paths.append('{}/tables/{}/descriptor.bin'.format(
+                self._db_path, table.id()))
+        self.delete_tables(names)
+        for path in paths:
+            try:
+                self._storage.delete_file(path)
+            except UserWarning:
+                pass
+
     def delete_collection(self, collection_name):
         if collection_name not in self._collections.names:
             raise ScannerException('Collection with name {} does not exist'
@@ -679,6 +813,35 @@ class Database:
                 if p not in ingest_result.failed_paths],
                 failures)
 
+    def append_video(self, table, path):
+        """
+        Appends a video to the end of a table created by ingest_videos, e.g.
+        the next segment of a recording which is still in progress.
+
+        Args:
+            table: Name of the table (or Table) to append to.
+            path: Path to the video to append.
+
+        Returns:
+            The updated Table.
+        """
+        if isinstance(table, Table):
+            table = table.name()
+        ingest_params = self.protobufs.IngestParameters()
+        ingest_params.table_names.append(table)
+        ingest_params.video_paths.append(path)
+        ingest_params.append = True
+        ingest_result = self._try_rpc(
+            lambda: self._master.IngestVideos(ingest_params))
+        if len(ingest_result.failed_paths) > 0:
+            raise ScannerException('Failed to append {}: {}'.format(
+                path, ingest_result.failed_messages[0]))
+        if not ingest_result.result.success:
+            raise ScannerException(ingest_result.result.msg)
+
+        self._cached_db_metadata = None
+        return self.table(table)
+
     def ingest_video_collection(self, collection_name, videos, force=False):
         """
         Creates a Collection from a list of videos.
@@ -736,7 +899,8 @@ class Database:
     def delete_table(self, name):
         self.delete_tables([name])
 
-    def new_table(self, name, columns, rows, fn=None, force=False):
+    def new_table(self, name, columns, rows, fn=None, force=False,
+                  index=None):
         """
         Creates a new table from a list of rows.
 
@@ -750,6 +914,8 @@ class Database:
         Kwargs:
             fn: TODO(wcrichto)
             force: TODO(apoms)
+            index: Optional list of values to store in the index column of
+                   each row, by default the row numbers.
 
         Returns:
             The new table object.
@@ -766,7 +932,7 @@ class Database:
         cols = copy.copy(columns)
         cols.insert(0, "index")
         for i, row in enumerate(rows):
-            row.insert(0, struct.pack('=Q', i))
+            row.insert(0, struct.pack('=Q', i if index is None else index[i]))
         self._bindings.new_table(self._db, name, cols, rows)
         self._cached_db_metadata = None
         return self.table(name)
@@ -839,20 +1005,29 @@ class Database:
         in_edges_left = defaultdict(int)
         input_tables = []
 
-        # Coalesce multiple inputs into a single table
+        # Coalesce multiple inputs into a single table. Only ops reachable
+        # from the output are visited, so ops whose outputs are never used
+        # are dropped. InputTables which sample the same rows of the same
+        # table are loaded once.
         start_node = self.ops.Input([], None, None)
         explored_nodes = set()
         stack = [op]
         to_change = []
+        table_index = {}
+        sample_index = {}
         while len(stack) > 0:
             c = stack.pop()
             explored_nodes.add(c)
 
             for input in c._inputs:
                 if input._op._name == "InputTable" and input._op != start_node:
-                    if not input._op in input_tables:
-                        input_tables.append(input._op)
-                    idx = input_tables.index(input._op)
+                    if input._op not in table_index:
+                        samples = input._op._generator().SerializeToString()
+                        if samples not in sample_index:
+                            sample_index[samples] = len(input_tables)
+                            input_tables.append(input._op)
+                        table_index[input._op] = sample_index[samples]
+                    idx = table_index[input._op]
                     to_change.append((input, idx))
                     input._op = start_node
 
@@ -868,12 +1043,50 @@ class Database:
         for (input, idx) in to_change:
             input._col = input_col_name(input._col, idx)
 
+        # Common subexpression elimination: ops with the same kernel, args and
+        # inputs compute the same columns, so consumers of later duplicates
+        # are pointed at the first one. Ops are visited after their inputs.
+        canonical = {start_node: start_node}
+        op_keys = {}
+        stack = [op]
+        while len(stack) > 0:
+            c = stack[-1]
+            pending = [i._op for i in c._inputs if i._op not in canonical]
+            if len(pending) > 0:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if c in canonical:
+                continue
+            for input in c._inputs:
+                input._op = canonical[input._op]
+            proto = c.to_proto(defaultdict(int))
+            del proto.inputs[:]
+            key = (proto.SerializeToString(),
+                   tuple((id(i._op), i._col) for i in c._inputs))
+            canonical[c] = op_keys.setdefault(key, c)
+
+        # Only load the input columns which some op actually consumes. The
+        # index column is always kept since the output table needs it (and
+        # every sample must read at least one column).
+        consumed = set(['index'])
+        for c in explored_nodes:
+            for input in c._inputs:
+                if input._op == start_node:
+                    consumed.add(input._col)
+
         new_start_node_inputs = []
+        table_columns = []
         for i, t in enumerate(input_tables):
+            table_columns.append([])
             for c in t._inputs:
+                name = input_col_name(c._descriptor.name, i)
+                if name not in consumed and c._descriptor.name != 'index':
+                    continue
                 col = Column(c._table, c._descriptor, c._video_descriptor)
-                col._name = input_col_name(c._descriptor.name, i)
+                col._name = name
                 new_start_node_inputs.append(col)
+                table_columns[-1].append(c._descriptor.name)
         start_node._inputs = new_start_node_inputs
 
         # Perform DFS on modified graph
@@ -925,9 +1138,218 @@ class Database:
         for t in input_tables[1:]:
             task.samples.extend(t._generator().samples)
 
+        # Samplers emit every column of their table, so restrict them to the
+        # projected columns in the same order as the InputTable op
+        for sample, names in zip(task.samples, table_columns):
+            del sample.column_names[:]
+            sample.column_names.extend(names)
+
         return [e.to_proto(eval_index) for e in eval_sorted], \
           task, input_tables[0]
 
+    def _compression_options(self, job):
+        compression_options = []
+        # For index column
+        opts = self.protobufs.OutputColumnCompression()
+        opts.codec = 'default'
+        compression_options.append(opts)
+        for out_col in job.op(self).inputs():
+            opts = self.protobufs.OutputColumnCompression()
+            opts.codec = 'default'
+            if out_col._type == self.protobufs.Video:
+                for k, v in out_col._encode_options.iteritems():
+                    if k == 'codec':
+                        opts.codec = v
+                    else:
+                        opts.options[k] = str(v)
+            compression_options.append(opts)
+        return compression_options
+
+    def _job_samples(self, job):
+        # The samples of every InputTable a job reads from. Unlike _toposort,
+        # this does not modify the DAG of the job.
+        samples = set()
+        explored_nodes = set()
+        stack = [job.op(self)]
+        while len(stack) > 0:
+            c = stack.pop()
+            explored_nodes.add(c)
+            for input in c._inputs:
+                if input._op._name == "InputTable":
+                    samples.add(input._op._generator().SerializeToString())
+                elif input._op not in explored_nodes:
+                    stack.append(input._op)
+        return tuple(sorted(samples))
+
+    def _merge_jobs(self, jobs):
+        # Jobs which read the same rows of the same tables are run as a single
+        # task which computes the columns of all of them and splits them over
+        # their output tables. The rows are then loaded and decoded once, and
+        # ops the jobs have in common (e.g. a Resize before several models)
+        # run once. Returns None if no jobs can be merged.
+        groups = collections.OrderedDict()
+        for job in jobs:
+            if job.name() is None:
+                return None
+            groups.setdefault(self._job_samples(job), []).append(job)
+        # All tasks of a job share one DAG, so every group must merge into the
+        # same DAG
+        sizes = set(len(group) for group in groups.values())
+        if len(sizes) != 1 or sizes.pop() == 1:
+            return None
+
+        ops = None
+        tasks = []
+        for group in groups.values():
+            job = Job(columns=[c for j in group for c in j._columns],
+                      name=group[0].name())
+            compression_options = self._compression_options(job)
+            group_ops, task, _ = self._toposort(job)
+
+            # Columns which several jobs compute identically are output once
+            # and written to each of their tables
+            output = group_ops[-1]
+            positions = {}
+            unique = []
+            for i, inp in enumerate(output.inputs):
+                key = inp.SerializeToString()
+                if key not in positions:
+                    positions[key] = len(unique)
+                    unique.append(i)
+            column_index = [positions[inp.SerializeToString()]
+                            for inp in output.inputs]
+            inputs = []
+            for i in unique:
+                inp = self.protobufs.OpInput()
+                inp.CopyFrom(output.inputs[i])
+                inputs.append(inp)
+            del output.inputs[:]
+            output.inputs.extend(inputs)
+            compression_options = [compression_options[i] for i in unique]
+
+            if ops is None:
+                ops = group_ops
+            elif [o.SerializeToString() for o in ops] != \
+                 [o.SerializeToString() for o in group_ops]:
+                raise ScannerException(
+                    'Jobs which read the same rows must be computed by the '
+                    'same ops for every input when run together')
+
+            # The first job of the group writes to the task's output table and
+            # the others to its splits. The index column is at position 0.
+            offset = 1
+            for i, j in enumerate(group):
+                columns = column_index[offset:offset + len(j._columns)]
+                offset += len(j._columns)
+                if i == 0:
+                    task.columns.extend(columns)
+                else:
+                    split = task.splits.add()
+                    split.output_table_name = j.name()
+                    split.columns.extend(columns)
+            tasks.append(task)
+
+        return ops, tasks, compression_options
+
+    def _ops_fingerprint(self, ops, compression_options):
+        # Hashes what determines how each output row is computed and stored:
+        # the op DAG (including kernel args and output columns) and the output
+        # compression
+        h = hashlib.sha1()
+        for op in ops:
+            h.update(op.SerializeToString())
+        for opts in compression_options:
+            h.update(opts.codec)
+            for k in sorted(opts.options):
+                h.update(k)
+                h.update(opts.options[k])
+        return h.hexdigest()
+
+    def _task_fingerprint(self, ops, task, compression_options):
+        # Hashes everything that determines the contents of the output table
+        # of a task: the ops fingerprint, the sampled rows and the descriptors
+        # of the input tables, which change whenever an input table is
+        # recreated.
+        h = hashlib.sha1()
+        h.update(self._ops_fingerprint(ops, compression_options))
+        for sample in task.samples:
+            h.update(sample.SerializeToString())
+            table = self.table(sample.table_name)
+            h.update(table._descriptor_proto().SerializeToString())
+        return h.hexdigest()
+
+    def _incremental_task(self, task):
+        # Restricts the samples of a task to the input rows after the last row
+        # its existing output table was computed from. Returns False if there
+        # are no such rows.
+        output = self.table(task.output_table_name)
+        descriptor = output._descriptor_proto()
+        if descriptor.job_id == -1:
+            raise ScannerException(
+                'Table {} was not computed by a job, so it can not be '
+                'updated incrementally'.format(task.output_table_name))
+        if descriptor.ops_fingerprint != task.ops_fingerprint:
+            raise ScannerException(
+                'Table {} was computed by different ops or output columns, so '
+                'it can not be updated incrementally'
+                .format(task.output_table_name))
+        last_row = -1
+        if len(descriptor.end_rows) > 0:
+            last_row = [i for _, i in output.load(
+                ['index'], fn=output._parse_index,
+                rows=[descriptor.end_rows[-1] - 1])][0]
+
+        has_rows = False
+        for sample in task.samples:
+            args = self.protobufs.StridedRangeSamplerArgs()
+            if sample.sampling_function == 'All':
+                all_args = self.protobufs.AllSamplerArgs()
+                all_args.ParseFromString(sample.sampling_args)
+                num_rows = self.table(sample.table_name).num_rows()
+                args.stride = 1
+                for s in range(last_row + 1, num_rows, all_args.sample_size):
+                    args.warmup_starts.append(
+                        max(0, s - all_args.warmup_size))
+                    args.starts.append(s)
+                    args.ends.append(min(s + all_args.sample_size, num_rows))
+            elif sample.sampling_function == 'StridedRange':
+                old_args = self.protobufs.StridedRangeSamplerArgs()
+                old_args.ParseFromString(sample.sampling_args)
+                stride = old_args.stride
+                args.stride = stride
+                for ws, s, e in zip(old_args.warmup_starts, old_args.starts,
+                                    old_args.ends):
+                    new_s = s
+                    if s <= last_row:
+                        # First row of the stride after the last computed row
+                        new_s = s + ((last_row - s) // stride + 1) * stride
+                    if new_s < e:
+                        args.warmup_starts.append(max(0, new_s - (s - ws)))
+                        args.starts.append(new_s)
+                        args.ends.append(e)
+            else:
+                raise ScannerException(
+                    'Incremental runs only support the All and StridedRange '
+                    'samplers, not {}'.format(sample.sampling_function))
+            sample.sampling_function = 'StridedRange'
+            sample.sampling_args = args.SerializeToString()
+            has_rows = has_rows or len(args.starts) > 0
+        return has_rows
+
+    def _job_chunks(self, job_params, tasks):
+        # Splits a job into messages of at most about JOB_CHUNK_SIZE bytes of
+        # tasks. The first message holds the rest of the job parameters.
+        chunks = [job_params]
+        size = 0
+        for task in tasks:
+            task_size = task.ByteSize()
+            if size > 0 and size + task_size > JOB_CHUNK_SIZE:
+                chunks.append(self.protobufs.JobParameters())
+                size = 0
+            chunks[-1].task_set.tasks.add().CopyFrom(task)
+            size += task_size
+        return chunks
+
     def _parse_size_string(self, s):
         (prefix, suffix) = (s[:-1], s[-1])
         mults = {
@@ -940,7 +1362,26 @@ class Database:
             raise ScannerException('Invalid size suffix in "{}"'.format(s))
         return int(prefix) * mults[suffix]
 
-    def run(self, jobs,
+    def cancel(self):
+        """
+        Cancels the running job and all queued jobs. Workers stay up, so the
+        cluster is ready to run the next job.
+        """
+        self._try_rpc(lambda: self._master.CancelJob(self.protobufs.JobId()))
+
+    def run(self, jobs, **kwargs):
+        """
+        Runs a computation over a set of inputs and waits for it to finish.
+
+        Takes the same arguments as run_async.
+
+        Returns:
+            Either the output Collection if output_collection is specified
+            or a list of Table objects.
+        """
+        return self.run_async(jobs, **kwargs).result()
+
+    def run_async(self, jobs,
             force=False,
             work_item_size=250,
             io_item_size=-1,
@@ -950,7 +1391,11 @@ class Database:
             show_progress=True,
             profiling=False,
             load_sparsity_threshold=8,
-            tasks_in_queue_per_pu=4):
+            tasks_in_queue_per_pu=4,
+            reuse=False,
+            incremental=False,
+            fused_rows=0,
+            share_inputs=True):
         """
         Runs a computation over a set of inputs.
 
@@ -972,36 +1417,56 @@ class Database:
             gpu_pool: TODO(wcrichto)
             pipeline_instances_per_node: TODO(wcrichto)
             show_progress: TODO(wcrichto)
+            reuse: If true, tasks whose output table already exists and was
+                   computed by the same ops from the same inputs are not run
+                   again, even with force. Tables are compared by a
+                   fingerprint of the op DAG (including kernel args), the
+                   output compression, the sampled rows and the input table
+                   descriptors. It does not cover the code or version of the
+                   kernels, nor run options like fused_rows, so do not reuse
+                   tables after changing a kernel.
+            incremental: If true, tasks whose output table already exists
+                         only process the input rows after the ones the table
+                         was computed from, and append their outputs to it.
+                         The ops must be the same as the ones which computed
+                         the table, otherwise a ScannerException is raised.
+                         Only supports the All and StridedRange samplers.
+            fused_rows: If positive, consecutive CPU ops without stencils
+                        process this many rows at a time through all of the
+                        ops, instead of each op processing a whole work item
+                        before the next one. This keeps intermediate frames
+                        in cache, which helps when memory bandwidth is the
+                        bottleneck. It is rounded up to a multiple of the
+                        batch size of every fused op, so that ops only get
+                        partial batches at the end of a task.
+            share_inputs: If true, named jobs in a list which read the same
+                          rows of the same tables are run as one task, so
+                          those rows are only loaded and decoded once and ops
+                          the jobs have in common only run once. All of the
+                          merged jobs' ops then run in the same pipeline
+                          instance, so set to false if they do not fit in
+                          the memory of one device together.
 
         Returns:
-            Either the output Collection if output_collection is specified
-            or a list of Table objects.
+            A JobFuture whose result() is either the output Collection if
+            output_collection is specified or a list of Table objects. Jobs
+            are queued by the master and run in order of submission.
         """
 
-        # Get compression annotations
-
-        compression_options = []
-        # For index column
-        opts = self.protobufs.OutputColumnCompression()
-        opts.codec = 'default'
-        compression_options.append(opts)
-        output_op = jobs[0].op(self) if isinstance(jobs, list) else jobs.op(self)
-        for out_col in output_op.inputs():
-            opts = self.protobufs.OutputColumnCompression()
-            opts.codec = 'default'
-            if out_col._type == self.protobufs.Video:
-                for k, v in out_col._encode_options.iteritems():
-                    if k == 'codec':
-                        opts.codec = v
-                    else:
-                        opts.options[k] = str(v)
-            compression_options.append(opts)
-
         output_collection = None
-        if isinstance(jobs, list):
+        table_names = None
+        merged = None
+        if isinstance(jobs, list) and share_inputs and not incremental:
+            merged = self._merge_jobs(jobs)
+        if merged is not None:
+            ops, tasks, compression_options = merged
+            table_names = [job.name() for job in jobs]
+        elif isinstance(jobs, list):
+            compression_options = self._compression_options(jobs[0])
             ops, task, _ = self._toposort(jobs[0])
             tasks = [task] + [self._toposort(job)[1] for job in jobs[1:]]
         else:
+            compression_options = self._compression_options(jobs)
             job = jobs
             ops, task, input_op = self._toposort(job)
             tasks = [task]
@@ -1017,22 +1482,63 @@ class Database:
                     t_task.output_table_name = '{}:{}'.format(
                         output_collection,
                         t.name().split(':')[-1])
+                    # Load the same projected columns as the first table
+                    for sample, projected in zip(t_task.samples, task.samples):
+                        del sample.column_names[:]
+                        sample.column_names.extend(projected.column_names)
                     tasks.append(t_task)
 
         to_delete = []
+        to_run = []
         for task in tasks:
+            task.ops_fingerprint = self._ops_fingerprint(
+                ops, compression_options)
+            task.fingerprint = self._task_fingerprint(
+                ops, task, compression_options)
+            if len(task.splits) > 0:
+                # Merged tasks are only skipped if all of their tables are up
+                # to date, and are never appended to
+                names = [task.output_table_name]
+                fingerprints = [task.fingerprint]
+                for split in task.splits:
+                    split.fingerprint = hashlib.sha1(
+                        task.fingerprint +
+                        ','.join(str(c) for c in split.columns)).hexdigest()
+                    names.append(split.output_table_name)
+                    fingerprints.append(split.fingerprint)
+                existing = [n for n in names if self.has_table(n)]
+                if reuse and len(existing) == len(names) and \
+                   all(self.table(n)._descriptor_proto().fingerprint == f
+                       for n, f in zip(names, fingerprints)):
+                    continue
+                if len(existing) > 0 and not force:
+                    raise ScannerException('Job would overwrite existing table {}'
+                                           .format(existing[0]))
+                to_delete.extend(existing)
+                to_run.append(task)
+                continue
             if self.has_table(task.output_table_name):
+                table = self.table(task.output_table_name)
+                if reuse and \
+                   table._descriptor_proto().fingerprint == task.fingerprint:
+                    # Output table is already up to date
+                    continue
+                if incremental:
+                    if self._incremental_task(task):
+                        task.append = True
+                        to_run.append(task)
+                    continue
                 if force:
                     to_delete.append(task.output_table_name)
                 else:
                     raise ScannerException('Job would overwrite existing table {}'
                                            .format(task.output_table_name))
+            to_run.append(task)
         self.delete_tables(to_delete)
 
         job_params = self.protobufs.JobParameters()
         job_name = ''.join(choice(ascii_uppercase) for _ in range(12))
         job_params.job_name = job_name
-        job_params.task_set.tasks.extend(tasks)
         job_params.task_set.ops.extend(ops)
         job_params.task_set.compression.extend(compression_options)
         job_params.pipeline_instances_per_node = pipeline_instances_per_node or -1
@@ -1042,6 +1548,7 @@ class Database:
         job_params.profiling = profiling
         job_params.tasks_in_queue_per_pu = tasks_in_queue_per_pu
         job_params.load_sparsity_threshold = load_sparsity_threshold
+        job_params.fused_rows = fused_rows
 
         job_params.memory_pool_config.pinned_cpu = False
         if cpu_pool is not None:
@@ -1057,40 +1564,36 @@ class Database:
             size = self._parse_size_string(gpu_pool)
             job_params.memory_pool_config.gpu.free_space = size
 
-        # Run the job
-        self._try_rpc(lambda: self._master.NewJob(job_params))
-
-        while True:
-            try:
-                result = self._master.IsJobDone(self.protobufs.Empty())
-            except grpc.RpcError as e:
-                raise ScannerException(e)
-            if result.finished:
-                break
-            else:
-                time.sleep(1.0)
-
-        if not result.result.success:
-            raise ScannerException(result.result.msg)
+        # Submit the job, unless every output table could be reused
+        if len(to_run) > 0:
+            chunks = self._job_chunks(job_params, to_run)
+            self._try_rpc(lambda: self._master.NewJobStream(iter(chunks)))
+        else:
+            job_name = None
 
-        # Invalidate db metadata because of job run
-        self._cached_db_metadata = None
+        def finish():
+            # Invalidate db metadata because of job run
+            self._cached_db_metadata = None
 
-        db_meta = self._load_db_metadata()
-        job_id = None
-        for job in db_meta.jobs:
-            if job.name == job_name:
-                job_id = job.id
-        if job_id is None:
-            raise ScannerException('Internal error: job id not found after run')
-
-        # Return a new collection if the input was a collection, otherwise
-        # return a table list
-        table_names = [task.output_table_name for task in tasks]
-        if output_collection is not None:
-            return self.new_collection(output_collection, table_names, force, job_id)
-        else:
-            if isinstance(jobs, list):
-                return [self.table(t) for t in table_names]
+            db_meta = self._load_db_metadata()
+            job_id = None
+            for job in db_meta.jobs:
+                if job.name == job_name:
+                    job_id = job.id
+            if job_id is None and job_name is not None:
+                raise ScannerException('Internal error: job id not found after run')
+
+            # Return a new collection if the input was a collection, otherwise
+            # return a table list
+            names = table_names
+            if names is None:
+                names = [task.output_table_name for task in tasks]
+            if output_collection is not None:
+                return self.new_collection(output_collection, names, force, job_id)
             else:
-                return self.table(table_names[0])
+                if isinstance(jobs, list):
+                    return [self.table(t) for t in names]
+                else:
+                    return self.table(names[0])
+
+        return JobFuture(self, job_name, finish)
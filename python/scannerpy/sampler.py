@@ -26,20 +26,72 @@ class TableSampler:
         sample.sampling_args = sampler_args.SerializeToString()
         return task
 
-    def strided(self, stride, task_size=DEFAULT_TASK_SIZE):
-        return self.strided_range(0, self._table.num_rows(), stride, task_size=task_size)
+    def strided(self, stride, task_size=DEFAULT_TASK_SIZE,
+                keyframe_column=None):
+        return self.strided_range(0, self._table.num_rows(), stride, task_size=task_size,
+                                  keyframe_column=keyframe_column)
 
-    def range(self, start, end, task_size=DEFAULT_TASK_SIZE, warmup_size=0):
+    def range(self, start, end, task_size=DEFAULT_TASK_SIZE, warmup_size=0,
+              keyframe_column=None):
         return self.ranges([(start, end)], task_size=task_size,
-                           warmup_size=warmup_size)
+                           warmup_size=warmup_size,
+                           keyframe_column=keyframe_column)
 
-    def ranges(self, intervals, task_size=DEFAULT_TASK_SIZE, warmup_size=0):
+    def ranges(self, intervals, task_size=DEFAULT_TASK_SIZE, warmup_size=0,
+               keyframe_column=None):
         return self.strided_ranges(
             intervals, 1,
             task_size=task_size,
-            warmup_size=warmup_size)
+            warmup_size=warmup_size,
+            keyframe_column=keyframe_column)
 
-    def gather(self, rows, task_size=DEFAULT_TASK_SIZE):
+    def _keyframe_rows(self, column):
+        return self._table.columns(column)._keyframe_rows()
+
+    def _gop_splits(self, rows, task_size, keyframe_column):
+        # Group the (sorted, unique) rows by the keyframe they decode from and
+        # pack whole groups into tasks of about task_size rows
+        keyframes = self._keyframe_rows(keyframe_column)
+        gops = np.searchsorted(keyframes, rows, side='right')
+        group_starts = np.concatenate(
+            ([0], np.flatnonzero(np.diff(gops)) + 1, [len(rows)]))
+        splits = [0]
+        prev = 0
+        for g in group_starts[1:]:
+            if g - splits[-1] > task_size and prev > splits[-1]:
+                splits.append(prev)
+            prev = g
+        if splits[-1] != len(rows):
+            splits.append(len(rows))
+        return splits
+
+    def _gop_end(self, keyframes, start, end, s, e, stride):
+        # Moves the end e of the task starting at s onto the first strided
+        # row of a keyframe interval: the last one starting in (s, e], or
+        # failing that the first one after e
+        def first_row(k):
+            return start + -(-(k - start) // stride) * stride
+        i = np.searchsorted(keyframes, e, side='right')
+        if i > 0 and first_row(int(keyframes[i - 1])) > s:
+            return min(first_row(int(keyframes[i - 1])), end)
+        if i < len(keyframes):
+            return min(first_row(int(keyframes[i])), end)
+        return end
+
+    def gather(self, rows, task_size=DEFAULT_TASK_SIZE, keyframe_column=None):
+        """
+        Selects an arbitrary list of rows.
+
+        Args:
+            rows: List or numpy array of rows to select.
+
+        Kwargs:
+            task_size: Number of rows per task.
+            keyframe_column: Name of an h264 video column. If given, rows
+                             are sorted, deduplicated and split into tasks on
+                             that column's keyframes, so that no keyframe
+                             interval is decoded by more than one task.
+        """
         task = self._db.protobufs.Task()
         #task.output_table_name = output_table_name
         column_names = [c.name() for c in self._table.columns()]
@@ -48,23 +100,196 @@ class TableSampler:
         sample.column_names.extend(column_names)
         sample.sampling_function = "Gather"
         sampler_args = self._db.protobufs.GatherSamplerArgs()
-        s = 0
-        while s < len(rows):
-            e = min(s + task_size, len(rows))
+        rows = np.asarray(rows, dtype=np.int64)
+        if keyframe_column is not None:
+            rows = np.unique(rows)
+            splits = self._gop_splits(rows, task_size, keyframe_column)
+        else:
+            splits = range(0, len(rows), task_size) + [len(rows)]
+        for s, e in zip(splits[:-1], splits[1:]):
+            gaps, lengths = self._encode_runs(rows[s:e])
             sampler_args_sample = sampler_args.samples.add()
-            sampler_args_sample.rows[:] = rows[s:e]
-            s = e
+            sampler_args_sample.run_gaps.extend(gaps.tolist())
+            sampler_args_sample.run_lengths.extend(lengths.tolist())
+        sample.sampling_args = sampler_args.SerializeToString()
+        return task
+
+    def _encode_runs(self, rows):
+        # Splits rows into runs of consecutive rows, each stored as its
+        # distance from the end of the previous run and its length
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(rows) != 1) + 1))
+        lengths = np.diff(np.append(starts, len(rows)))
+        run_starts = rows[starts]
+        run_ends = run_starts + lengths
+        gaps = run_starts - np.concatenate(([0], run_ends[:-1]))
+        return gaps, lengths
+
+    def time_range(self, start_s, end_s, fps=None, column='frame',
+                   task_size=DEFAULT_TASK_SIZE, warmup_size=0):
+        """
+        Selects the frames of a video column shown in [start_s, end_s).
+
+        Args:
+            start_s: Start time in seconds.
+            end_s: End time in seconds.
+
+        Kwargs:
+            fps: Number of frames per second to select, by default every frame.
+            column: Name of the h264 video column whose frame rate and
+                    keyframes the times are resolved against.
+            task_size: Number of rows per task.
+            warmup_size: Number of rows before each task to warm up ops with
+                         (only when the selected frames are evenly strided).
+        """
+        video_fps = self._table.columns(column)._fps()
+        num_rows = self._table.num_rows()
+        start = int(np.ceil(start_s * video_fps - 1e-6))
+        end = min(num_rows, int(np.ceil(end_s * video_fps - 1e-6)))
+        if fps is None or fps >= video_fps:
+            return self.range(start, max(start, end), task_size=task_size,
+                              warmup_size=warmup_size, keyframe_column=column)
+
+        # Frames shown at start_s, start_s + 1/fps, ... If those are evenly
+        # spaced rows this is a strided range, otherwise gather them. Times
+        # past the end of the video have no frame, so both drop them.
+        times = np.arange(start_s, end_s, 1.0 / fps)
+        rows = np.unique(np.floor(times * video_fps + 1e-6).astype(np.int64))
+        rows = rows[rows < end]
+        stride = video_fps / float(fps)
+        if abs(stride - round(stride)) < 1e-6 and len(rows) > 0:
+            return self.strided_range(int(rows[0]), end, int(round(stride)),
+                                      task_size=task_size,
+                                      warmup_size=warmup_size,
+                                      keyframe_column=column)
+        return self.gather(rows, task_size=task_size, keyframe_column=column)
+
+    def every(self, seconds, column='frame', task_size=DEFAULT_TASK_SIZE):
+        """
+        Selects one frame of a video column every `seconds` seconds.
+
+        Kwargs:
+            column: Name of the h264 video column to resolve times against.
+            task_size: Number of rows per task.
+        """
+        duration = self._table.num_rows() / self._table.columns(column)._fps()
+        return self.time_range(0, duration, fps=1.0 / seconds, column=column,
+                               task_size=task_size)
+
+    def _random(self, fraction, count, bucket_size, seed, task_size,
+                keyframe_column):
+        task = self._db.protobufs.Task()
+        column_names = [c.name() for c in self._table.columns()]
+        sample = task.samples.add()
+        sample.table_name = self._table.name()
+        sample.column_names.extend(column_names)
+        sample.sampling_function = "Random"
+        sampler_args = self._db.protobufs.RandomSamplerArgs()
+        sampler_args.fraction = fraction
+        sampler_args.count = count
+        sampler_args.bucket_size = bucket_size
+        sampler_args.seed = seed
+        sampler_args.sample_size = task_size
+        if keyframe_column is not None:
+            sampler_args.keyframe_column = keyframe_column
+        sample.sampling_args = sampler_args.SerializeToString()
+        return task
+
+    def random(self, fraction, seed=0, task_size=DEFAULT_TASK_SIZE,
+               keyframe_column=None):
+        """
+        Selects a random subset of the rows, in order. The rows are drawn by
+        the master from the seed, so the same seed selects the same rows.
+
+        Args:
+            fraction: Fraction of the rows to select.
+
+        Kwargs:
+            seed: Seed of the random draw. It is combined with the table id,
+                  so tables of a collection draw different rows.
+            task_size: Number of rows per task.
+            keyframe_column: Name of an h264 video column whose keyframes
+                             tasks are split on.
+        """
+        return self._random(fraction, 0, 0, seed, task_size, keyframe_column)
+
+    def stratified(self, count, seed=0, bucket_size=None, bucket_seconds=None,
+                   task_size=DEFAULT_TASK_SIZE, keyframe_column=None):
+        """
+        Selects `count` random rows of the table, or of each bucket of rows.
+        Over a collection, this draws `count` rows from every table.
+
+        Args:
+            count: Number of rows to select per table or bucket.
+
+        Kwargs:
+            seed: Seed of the random draw (see `random`).
+            bucket_size: Number of rows per bucket.
+            bucket_seconds: Length of each bucket in seconds of
+                            keyframe_column, instead of bucket_size. Requires
+                            keyframe_column.
+            task_size: Number of rows per task.
+            keyframe_column: Name of an h264 video column whose keyframes
+                             tasks are split on, or None.
+        """
+        if bucket_seconds is not None:
+            if keyframe_column is None:
+                raise ScannerException(
+                    'stratified with bucket_seconds needs a keyframe_column '
+                    'to convert seconds into rows')
+            fps = self._table.columns(keyframe_column)._fps()
+            bucket_size = max(1, int(round(bucket_seconds * fps)))
+        return self._random(0, count, bucket_size or 0, seed, task_size,
+                            keyframe_column)
+
+    def keyframes(self, column='frame', task_size=DEFAULT_TASK_SIZE):
+        """
+        Selects only the keyframes of a compressed video column, so none of
+        the frames which depend on them need to be decoded.
+
+        Kwargs:
+            column: Name of the video column whose keyframes are selected.
+            task_size: Number of keyframes per task.
+        """
+        task = self._db.protobufs.Task()
+        column_names = [c.name() for c in self._table.columns()]
+        sample = task.samples.add()
+        sample.table_name = self._table.name()
+        sample.column_names.extend(column_names)
+        sample.sampling_function = "Keyframe"
+        sampler_args = self._db.protobufs.KeyframeSamplerArgs()
+        sampler_args.column = column
+        sampler_args.sample_size = task_size
         sample.sampling_args = sampler_args.SerializeToString()
         return task
 
     def strided_range(self, start, end, stride, task_size=DEFAULT_TASK_SIZE,
-                      warmup_size=0):
+                      warmup_size=0, keyframe_column=None):
         return self.strided_ranges([(start, end)], stride,
                                    task_size=task_size,
-                                   warmup_size=warmup_size)
+                                   warmup_size=warmup_size,
+                                   keyframe_column=keyframe_column)
 
     def strided_ranges(self, intervals, stride, task_size=DEFAULT_TASK_SIZE,
-                      warmup_size=0):
+                      warmup_size=0, keyframe_column=None):
+        """
+        Selects every stride-th row of each interval.
+
+        Args:
+            intervals: List of (start, end) row intervals.
+            stride: Distance between selected rows.
+
+        Kwargs:
+            task_size: Number of rows per task.
+            warmup_size: Number of (strided) rows before each task to warm
+                         up ops with.
+            keyframe_column: Name of an h264 video column. If given, tasks
+                             are split on that column's keyframes, so that no
+                             keyframe interval is decoded by more than one
+                             task.
+        """
+        keyframes = None
+        if keyframe_column is not None:
+            keyframes = self._keyframe_rows(keyframe_column)
         task = self._db.protobufs.Task()
         #task.output_table_name = output_table_name
         num_rows = self._table.num_rows()
@@ -80,6 +305,8 @@ class TableSampler:
             while s < end:
                 ws = max(0, s - warmup_size * stride)
                 e = min(s + task_size * stride, end)
+                if keyframes is not None and e < end:
+                    e = self._gop_end(keyframes, start, end, s, e, stride)
                 sampler_args.warmup_starts.append(ws)
                 sampler_args.starts.append(s)
                 sampler_args.ends.append(e)
@@ -14,20 +14,23 @@ def detect_faces(db, input_tables_or_collection, sampling, output_name,
     caffe_args = facenet_args.caffe_args
     caffe_args.net_descriptor.CopyFrom(descriptor.as_proto())
 
-    if isinstance(outputs[0], Collection):
+    if isinstance(input_tables_or_collection, Collection):
         input_tables = [input_tables_or_collection]
     else:
         input_tables = input_tables_or_collection
 
-    outputs = []
+    # All scales are run together so each frame is only decoded and resized
+    # once
     scales = [1.0, 0.5, 0.25, 0.125]
     batch_sizes = [int((2**i))
                    for i in range(len(scales))]
+    jobs = []
     for scale, batch in zip(scales, batch_sizes):
-        facenet_args.scale = scale
-        caffe_args.batch_size = batch
+        scale_args = db.protobufs.FacenetArgs()
+        scale_args.CopyFrom(facenet_args)
+        scale_args.scale = scale
+        scale_args.caffe_args.batch_size = batch
 
-        jobs = []
         for input_table in input_tables:
             frame = sampling(input_table.as_op())
             resized = db.ops.Resize(
@@ -38,22 +41,27 @@ def detect_faces(db, input_tables_or_collection, sampling, output_name,
             frame_info = db.ops.InfoFromFrame(frame = resized)
             facenet_input = db.ops.FacenetInput(
                 frame = resized,
-                args = facenet_args,
+                args = scale_args,
                 device = DeviceType.GPU)
             facenet = db.ops.Facenet(
                 facenet_input = facenet_input,
-                args = facenet_args,
+                args = scale_args,
                 device = DeviceType.GPU)
             facenet_output = db.ops.FacenetOutput(
                 facenet_output = facenet,
                 original_frame_info = frame_info,
-                args = facenet_args)
+                args = scale_args)
             job = Job(
                 columns = [facenet_output],
                 name = '{}_faces_{}'.format(output_name, scale))
             jobs.append(job)
-        output = db.run(jobs, force=True, work_item_size=batch * 4)
-        outputs.append(output)
+    # The scales share one work item size. 32 rows is a multiple of every
+    # batch size, so no scale gets partial batches, and each net still only
+    # holds one batch at a time; scale 1.0 just runs 32 batches of one frame
+    # per work item instead of 4.
+    tables = db.run(jobs, force=True, work_item_size=batch_sizes[-1] * 4)
+    n = len(input_tables)
+    outputs = [tables[i:i + n] for i in range(0, len(tables), n)]
 
     def make_bbox_table(input_table, outputs, name):
         all_bboxes = [
@@ -124,33 +132,36 @@ def detect_poses(db, input_tables_or_collection, sampling, output_name,
     else:
         input_tables = input_tables_or_collection
 
-    outputs = []
+    # All scales are run together so each frame is only decoded once
     scales = [1.0, 0.7, 0.49, 0.343]
+    jobs = []
     for scale in scales:
-        cpm2_args.scale = 368.0/height * scale
-        jobs = []
+        scale_args = db.protobufs.CPM2Args()
+        scale_args.CopyFrom(cpm2_args)
+        scale_args.scale = 368.0/height * scale
         for input_table in input_tables:
             frame = sampling(input_table.as_op())
             frame_info = db.ops.InfoFromFrame(frame = frame)
             cpm2_input = db.ops.CPM2Input(
                 frame = frame,
-                args = cpm2_args,
+                args = scale_args,
                 device = DeviceType.GPU)
             cpm2_resized_map, cpm2_joints = db.ops.CPM2(
                 cpm2_input = cpm2_input,
-                args = cpm2_args,
+                args = scale_args,
                 device = DeviceType.GPU)
             poses_out = db.ops.CPM2Output(
                 cpm2_resized_map = cpm2_resized_map,
                 cpm2_joints = cpm2_joints,
                 original_frame_info = frame_info,
-                args = cpm2_args)
+                args = scale_args)
             job = Job(
                 columns = [poses_out],
                 name = '{}_poses_{}'.format(output_name, scale))
             jobs.append(job)
-        output = db.run(jobs, force=True, work_item_size=8)
-        outputs.append(output)
+    tables = db.run(jobs, force=True, work_item_size=8)
+    n = len(input_tables)
+    outputs = [tables[i:i + n] for i in range(0, len(tables), n)]
 
     # Register nms pose op and kernel
     db.register_op('PoseNMSKernel', [], ['poses'], variadic_inputs=True)
@@ -181,3 +192,70 @@ def detect_poses(db, input_tables_or_collection, sampling, output_name,
                 name = '{}_poses_{}'.format(output_name, i))
             jobs.append(job)
         return db.run(jobs, force=True)
+
+
+def coarse_to_fine(db, input_table, build_op, column, score, threshold,
+                   output_name, stride=16, fn=None, keyframe_column='frame'):
+    """
+    Runs an op over every stride-th row of a table, then densely over only
+    the intervals between adjacent results which score above a threshold.
+
+    Useful for finding rare events like shot boundaries without running the
+    op over every frame.
+
+    Args:
+        input_table: Table to sample from.
+        build_op: Function from the sampled input op to the op whose outputs
+                  are computed, e.g. lambda frame: db.ops.Histogram(frame=frame)
+        column: Name of the (non-video) output column of that op.
+        score: Function of two adjacent parsed results which returns a float.
+        threshold: Intervals whose score exceeds this are computed densely.
+        output_name: Name of the table of merged results.
+
+    Kwargs:
+        stride: Distance between rows of the coarse pass.
+        fn: Parser applied to the values of `column` before scoring.
+        keyframe_column: Video column whose keyframes tasks are split on, or
+                         None.
+
+    Returns:
+        A table with the results of both passes ordered by input row. Its
+        index column holds the input row of each result.
+    """
+    def run_pass(sampler, name):
+        job = Job(columns=[build_op(sampler)], name=name)
+        table = db.run(job, force=True, show_progress=False)
+        rows = table.parent_rows()
+        values = [str(vals[0]) for _, vals in table.load([column])]
+        db.delete_table(name)
+        return rows, values
+
+    coarse_rows, coarse_values = run_pass(
+        input_table.as_op().strided(stride, keyframe_column=keyframe_column),
+        '{}_coarse'.format(output_name))
+
+    parse = (lambda v: fn([v], db)) if fn is not None else (lambda v: v)
+    parsed = [parse(v) for v in coarse_values]
+    intervals = []
+    for i in range(1, len(parsed)):
+        if (coarse_rows[i] - coarse_rows[i-1] > 1 and
+            score(parsed[i-1], parsed[i]) > threshold):
+            intervals.append((coarse_rows[i-1] + 1, coarse_rows[i]))
+    # Rows after the last coarse result have nothing to be scored against, so
+    # they are always computed
+    num_rows = input_table.num_rows()
+    if len(coarse_rows) > 0 and coarse_rows[-1] < num_rows - 1:
+        intervals.append((coarse_rows[-1] + 1, num_rows))
+
+    results = dict(zip(coarse_rows, coarse_values))
+    if len(intervals) > 0:
+        fine_rows, fine_values = run_pass(
+            input_table.as_op().ranges(intervals,
+                                       keyframe_column=keyframe_column),
+            '{}_fine'.format(output_name))
+        results.update(zip(fine_rows, fine_values))
+
+    rows = sorted(results.keys())
+    return db.new_table(output_name, [column],
+                        [[results[r]] for r in rows],
+                        force=True, index=rows)
@@ -1,4 +1,9 @@
 import cv2
+import struct
+import numpy as np
+from subprocess import Popen, PIPE
+from threading import Thread
+from ..common import ScannerException
 
 def write_video(path, frames, fps=24.0):
     assert len(frames) > 0
@@ -11,3 +16,67 @@ def write_video(path, frames, fps=24.0):
 
     for frame in frames:
         output.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+
+
+def annexb_packets(packets):
+    """
+    Splits a buffer of h264 packets as stored in a Scanner video column (each
+    packet prefixed by its 32-bit size) into a list of Annex B packets.
+    """
+    stream = []
+    pos = 0
+    while pos < len(packets):
+        (size,) = struct.unpack('=i', packets[pos:pos+4])
+        stream.append(packets[pos+4:pos+4+size])
+        pos += 4 + size
+    return stream
+
+
+def decode_h264(packets, width, height):
+    """
+    Decodes a run of h264 packets as stored in a Scanner video column (each
+    packet prefixed by its 32-bit size, starting at a keyframe) by piping it
+    through ffmpeg. Yields RGB frames in order, one per packet.
+    """
+    stream = annexb_packets(packets)
+
+    # Raw h264 has no timestamps, so keep ffmpeg from duplicating or dropping
+    # frames to produce a constant frame rate
+    proc = Popen(['ffmpeg', '-loglevel', 'error',
+                  '-f', 'h264', '-i', 'pipe:0',
+                  '-vsync', '0',
+                  '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1'],
+                 stdin=PIPE, stdout=PIPE)
+
+    # Feed ffmpeg from a separate thread so that it never blocks on a full
+    # output pipe while we are still writing its input
+    def feed():
+        try:
+            for packet in stream:
+                proc.stdin.write(packet)
+            proc.stdin.close()
+        except IOError:
+            # ffmpeg was killed because the consumer stopped early
+            pass
+    feeder = Thread(target=feed)
+    feeder.daemon = True
+    feeder.start()
+
+    frame_size = width * height * 3
+    num_frames = 0
+    try:
+        while True:
+            buf = proc.stdout.read(frame_size)
+            if len(buf) < frame_size:
+                break
+            num_frames += 1
+            yield np.frombuffer(buf, dtype=np.uint8).reshape((height, width, 3))
+        if num_frames != len(stream):
+            raise ScannerException(
+                'Decoded {} frames from {} h264 packets'
+                .format(num_frames, len(stream)))
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        feeder.join()
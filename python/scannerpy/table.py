@@ -2,8 +2,14 @@ from common import *
 from column import Column
 import struct
 from itertools import izip
+from functools import partial
 from sampler import SamplerOp
 from timeit import default_timer as now
+from collections import OrderedDict
+from threading import Lock
+
+# Maximum number of (column, item) row offset indices kept per table
+ROW_OFFSETS_CACHE_SIZE = 64
 
 class Table:
     """
@@ -18,6 +24,8 @@ class Table:
         self._name = name
         self._id = id
         self._descriptor = None
+        self._row_offsets_cache = OrderedDict()
+        self._row_offsets_lock = Lock()
 
     def id(self):
         return self._id
@@ -31,6 +39,10 @@ class Table:
                 self._db.protobufs.TableDescriptor,
                 'tables/{}/descriptor.bin'.format(self._id))
 
+    def _descriptor_proto(self):
+        self._need_descriptor()
+        return self._descriptor
+
     def _load_columns(self):
         self._need_descriptor()
         for c in self._descriptor.columns:
@@ -51,7 +63,9 @@ class Table:
                 'jobs/{}/descriptor.bin'.format(self._descriptor.job_id))
             self._task = None
             for task in self._job.tasks:
-                if task.output_table_name == self._name:
+                names = [task.output_table_name] + \
+                        [split.output_table_name for split in task.splits]
+                if self._name in names:
                     self._task = task
             if self._task is None:
                 raise ScannerException('Table {} not found in job {}'
@@ -100,6 +114,22 @@ class Table:
         self._need_descriptor()
         return self._descriptor.end_rows[-1]
 
+    def _row_offsets(self, column, item_id):
+        # LRU cache of per-item byte offsets, shared by all loads of a column.
+        # Items may be read concurrently by the prefetching reader.
+        key = (column.id(), item_id)
+        with self._row_offsets_lock:
+            offsets = self._row_offsets_cache.pop(key, None)
+            if offsets is not None:
+                self._row_offsets_cache[key] = offsets
+                return offsets
+        offsets = column._read_row_offsets(item_id)
+        with self._row_offsets_lock:
+            if len(self._row_offsets_cache) >= ROW_OFFSETS_CACHE_SIZE:
+                self._row_offsets_cache.popitem(last=False)
+            self._row_offsets_cache[key] = offsets
+        return offsets
+
     def _parse_index(self, bufs, db):
         return struct.unpack("=Q", bufs[0])[0]
 
@@ -117,12 +147,81 @@ class Table:
         else:
             raise ScannerException('Ingested videos do not have profile data')
 
-    def load(self, columns, fn=None, rows=None):
-        cols = [self.columns(c).load(rows=rows) for c in columns]
-        for tup in izip(*cols):
-            row = tup[0][0]
-            vals = [x for _, x in tup]
-            if fn is not None:
-                yield (row, fn(vals, self._db))
-            else:
-                yield (row, vals)
+    def load(self, columns, fn=None, rows=None, buffered=False, prefetch=2,
+             load_sparsity_threshold=8):
+        """
+        Loads the rows of several columns of the table into Python.
+
+        Args:
+            columns: List of column names or indices to load.
+
+        Kwargs:
+            fn: Optional function applied to the list of column values of
+                each row.
+            rows: Optional list of row indices to load.
+            buffered: If true, every requested item of every column is read
+                      concurrently up front. Otherwise, items are streamed
+                      with `prefetch` items of look-ahead.
+            prefetch: Number of items to read ahead of the one being consumed.
+            load_sparsity_threshold: See Column.load.
+
+        Returns:
+            Generator that yields (row, values) tuples.
+        """
+        cols = [self.columns(c) for c in columns]
+
+        # Compressed video columns are decoded by running a job, so they can't
+        # be read alongside the other columns
+        if any(c._is_compressed_video() for c in cols):
+            gens = [c.load(rows=rows, prefetch=prefetch,
+                           load_sparsity_threshold=load_sparsity_threshold)
+                    for c in cols]
+            for tup in izip(*gens):
+                row = tup[0][0]
+                vals = [x for _, x in tup]
+                if fn is not None:
+                    yield (row, fn(vals, self._db))
+                else:
+                    yield (row, vals)
+            return
+
+        # All columns share the same items, so the reads for every column of
+        # an item are issued together and run concurrently
+        items = cols[0]._item_rows(rows)
+        reads = [partial(c._read_item_rows, item_id, local_rows,
+                         load_sparsity_threshold)
+                 for item_id, _, local_rows in items for c in cols]
+        if buffered:
+            window = len(reads)
+        else:
+            window = (prefetch + 1) * len(cols) - 1
+        col_bufs = prefetch_results(self._db._io_pool(), reads, window)
+        row_parsers = [c._row_parser() for c in cols]
+        for _, item_rows, _ in items:
+            col_vals = [c._parse_rows(next(col_bufs), parser_fn, views)
+                        for c, (parser_fn, views) in izip(cols, row_parsers)]
+            for r, vals in izip(item_rows, izip(*col_vals)):
+                if fn is not None:
+                    yield (int(r), fn(list(vals), self._db))
+                else:
+                    yield (int(r), list(vals))
+
+    def load_array(self, column, rows=None, out=None, dtype=None):
+        """
+        Loads a raw frame or numeric column into a single numpy array.
+
+        Args:
+            column: Name or index of the column to load.
+
+        Kwargs:
+            rows: Optional list of row indices to load.
+            out: Optional preallocated array (e.g. an np.memmap) with one
+                 entry per loaded row to fill instead of allocating one.
+            dtype: Element type of each row for non-video columns.
+
+        Returns:
+            An array of shape (N, H, W, C) for frame columns, or (N, K) for
+            other columns.
+        """
+        return self.columns(column)._load_array(rows=rows, out=out,
+                                                dtype=dtype)
@@ -219,6 +219,33 @@ EvaluateWorker::EvaluateWorker(const EvaluateWorkerArgs& args)
   }
   assert(kernels_.size() > 0);
 
+  // Kernels are only fused if every output row depends on the same input row
+  // alone, and only on the CPU where the intermediate rows stay in cache
+  if (args.fused_rows > 0) {
+    bool fusable = true;
+    // Least common multiple of the batch sizes, so that slices only end in a
+    // partial batch at the end of a task
+    i64 batch_multiple = 1;
+    for (size_t i = 0; i < kernels_.size(); ++i) {
+      const std::vector<i32>& stencil = kernel_stencils_[i];
+      fusable = fusable && kernel_devices_[i].type == DeviceType::CPU &&
+                stencil.size() == 1 && stencil[0] == 0;
+      i64 batch_size = std::max(kernel_batch_sizes_[i], 1);
+      i64 a = batch_multiple, b = batch_size;
+      while (b != 0) {
+        i64 t = a % b;
+        a = b;
+        b = t;
+      }
+      batch_multiple = batch_multiple / a * batch_size;
+    }
+    if (fusable) {
+      // Round up to a whole number of batches of every kernel
+      fused_rows_ = (args.fused_rows + batch_multiple - 1) / batch_multiple *
+                    batch_multiple;
+    }
+  }
+
   for (auto& kernel : kernels_) {
     kernel->set_profiler(&args.profiler);
   }
@@ -306,10 +333,39 @@ void EvaluateWorker::feed(std::tuple<IOItem, EvalWorkEntry>& entry) {
         std::max(total_inputs_, (i32)work_entry.columns[i].size());
   }
 
-  std::vector<DeviceHandle> side_output_handles = work_entry.column_handles;
-  BatchedColumns side_output_columns = work_entry.columns;
-  std::vector<i64> side_row_ids = work_entry.row_ids;
+  if (fused_rows_ > 0) {
+    // Pass a few rows at a time through all kernels, so that intermediate
+    // columns are freed while still in cache instead of being materialized
+    // for the whole work item
+    for (i32 r = 0; r < total_inputs_; r += fused_rows_) {
+      std::vector<DeviceHandle> side_output_handles = work_entry.column_handles;
+      BatchedColumns side_output_columns(work_entry.columns.size());
+      for (size_t c = 0; c < work_entry.columns.size(); ++c) {
+        const ElementList& column = work_entry.columns[c];
+        i64 end = std::min((i64)column.size(), (i64)r + fused_rows_);
+        if (r < end) {
+          side_output_columns[c] =
+              ElementList(column.begin() + r, column.begin() + end);
+        }
+      }
+      i64 end = std::min((i64)work_entry.row_ids.size(), (i64)r + fused_rows_);
+      std::vector<i64> side_row_ids(work_entry.row_ids.begin() + r,
+                                    work_entry.row_ids.begin() + end);
+      evaluate_rows(side_output_handles, side_output_columns, side_row_ids);
+    }
+  } else {
+    std::vector<DeviceHandle> side_output_handles = work_entry.column_handles;
+    BatchedColumns side_output_columns = work_entry.columns;
+    std::vector<i64> side_row_ids = work_entry.row_ids;
+    evaluate_rows(side_output_handles, side_output_columns, side_row_ids);
+  }
+
+  profiler_.add_interval("feed", feed_start, now());
+}
 
+void EvaluateWorker::evaluate_rows(
+    std::vector<DeviceHandle>& side_output_handles,
+    BatchedColumns& side_output_columns, std::vector<i64>& side_row_ids) {
   // For each kernel, produce as much output as can be produced given current
   // input rows and stencil cache.
   for (size_t k = 0; k < kernels_.size(); ++k) {
@@ -379,7 +435,9 @@ void EvaluateWorker::feed(std::tuple<IOItem, EvalWorkEntry>& entry) {
       }
       producible_rows++;
     }
-    assert(producible_rows > 0);
+    // Only fused kernels can be handed rows which they do not produce
+    // anything for, e.g. warmup rows for a later kernel
+    assert(producible_rows > 0 || fused_rows_ > 0);
 
     // Setup side output columns to reflect the number of valid rows that will
     // be produced from this kernel
@@ -552,8 +610,6 @@ void EvaluateWorker::feed(std::tuple<IOItem, EvalWorkEntry>& entry) {
                                     side_output_columns[i].begin(),
                                     side_output_columns[i].end());
   }
-
-  profiler_.add_interval("feed", feed_start, now());
 }
 
 bool EvaluateWorker::yield(i32 item_size,
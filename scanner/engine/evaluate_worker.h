@@ -99,6 +99,9 @@ struct EvaluateWorkerArgs {
   std::vector<std::vector<i32>> kernel_stencils;
   // Batch size needed by kernels
   std::vector<i32> kernel_batch_sizes;
+  // Rows to pass through all kernels at a time, or 0 to run each kernel over
+  // the whole work item before the next one
+  i32 fused_rows;
 
   Profiler& profiler;
   proto::Result& result;
@@ -116,6 +119,10 @@ class EvaluateWorker {
   bool yield(i32 item_size, std::tuple<IOItem, EvalWorkEntry>& output);
 
  private:
+  void evaluate_rows(std::vector<DeviceHandle>& side_output_handles,
+                     BatchedColumns& side_output_columns,
+                     std::vector<i64>& side_row_ids);
+
   const i32 node_id_;
   const i32 worker_id_;
 
@@ -132,6 +139,8 @@ class EvaluateWorker {
   std::vector<std::vector<i32>> column_mapping_;
   std::vector<std::vector<i32>> kernel_stencils_;
   std::vector<i32> kernel_batch_sizes_;
+  // Rows to pass through all kernels at a time, 0 if kernels are not fused
+  i32 fused_rows_ = 0;
 
   // Used for computing complement of column mapping
   std::vector<std::set<i32>> column_mapping_set_;
@@ -25,6 +25,7 @@
 #include "storehouse/storage_backend.h"
 
 #include <glog/logging.h>
+#include <algorithm>
 #include <thread>
 
 // For video
@@ -215,30 +216,12 @@ void cleanup_video_codec(CodecState state) {
   av_bitstream_filter_close(state.annexb);
 }
 
-bool parse_and_write_video(storehouse::StorageBackend* storage,
-                           const std::string& table_name, i32 table_id,
-                           const std::string& path,
-                           std::string& error_message) {
-  proto::TableDescriptor table_desc;
-  table_desc.set_id(table_id);
-  table_desc.set_name(table_name);
-  table_desc.set_job_id(-1);
-  table_desc.set_timestamp(
-      std::chrono::duration_cast<std::chrono::seconds>(now().time_since_epoch())
-          .count());
-
-  {
-    Column* index_col = table_desc.add_columns();
-    index_col->set_name(index_column_name());
-    index_col->set_id(0);
-    index_col->set_type(ColumnType::Other);
-
-    Column* frame_col = table_desc.add_columns();
-    frame_col->set_name(frame_column_name());
-    frame_col->set_id(1);
-    frame_col->set_type(ColumnType::Video);
-  }
-
+// Writes the video at path as item item_id of a video table, with rows
+// numbered from start_row
+bool parse_and_write_video_item(storehouse::StorageBackend* storage,
+                                i32 table_id, i32 item_id, i64 start_row,
+                                const std::string& path, i64& num_frames,
+                                std::string& error_message) {
   // Setup custom buffer for libavcodec so that we can read from a storehouse
   // file instead of a posix file
   FFStorehouseState file_state{};
@@ -272,7 +255,7 @@ bool parse_and_write_video(storehouse::StorageBackend* storage,
   proto::VideoDescriptor& video_descriptor = video_meta.get_descriptor();
   video_descriptor.set_table_id(table_id);
   video_descriptor.set_column_id(1);
-  video_descriptor.set_item_id(0);
+  video_descriptor.set_item_id(item_id);
 
   video_descriptor.set_width(state.in_cc->width);
   video_descriptor.set_height(state.in_cc->height);
@@ -281,7 +264,7 @@ bool parse_and_write_video(storehouse::StorageBackend* storage,
   video_descriptor.set_chroma_format(proto::VideoDescriptor::YUV_420);
   video_descriptor.set_codec_type(proto::VideoDescriptor::H264);
 
-  std::string data_path = table_item_output_path(table_id, 1, 0);
+  std::string data_path = table_item_output_path(table_id, 1, item_id);
   std::unique_ptr<WriteFile> demuxed_bytestream{};
   BACKOFF_FAIL(make_unique_write_file(storage, data_path, demuxed_bytestream));
 
@@ -356,7 +339,10 @@ bool parse_and_write_video(storehouse::StorageBackend* storage,
     av_packet_unref(&state.av_packet);
   }
 
-  video_descriptor.set_time_base_num(state.in_cc->time_base.num);
+  // The codec time base can be a field duration (e.g. 1/(2 fps) for h264),
+  // so store the duration of a frame
+  video_descriptor.set_time_base_num(state.in_cc->time_base.num *
+                                     std::max(state.in_cc->ticks_per_frame, 1));
   video_descriptor.set_time_base_denom(state.in_cc->time_base.den);
 
   i64 frame = index_creator.frames();
@@ -381,11 +367,12 @@ bool parse_and_write_video(storehouse::StorageBackend* storage,
   BACKOFF_FAIL(demuxed_bytestream->save());
 
   // Create index column
-  std::string index_path = table_item_output_path(table_id, 0, 0);
+  std::string index_path = table_item_output_path(table_id, 0, item_id);
   std::unique_ptr<WriteFile> index_file{};
   BACKOFF_FAIL(make_unique_write_file(storage, index_path, index_file));
 
-  std::string index_metadata_path = table_item_metadata_path(table_id, 0, 0);
+  std::string index_metadata_path =
+      table_item_metadata_path(table_id, 0, item_id);
   std::unique_ptr<WriteFile> index_metadata_file{};
   BACKOFF_FAIL(make_unique_write_file(storage, index_metadata_path, index_metadata_file));
   s_write<i64>(index_metadata_file.get(), frame);
@@ -394,11 +381,11 @@ bool parse_and_write_video(storehouse::StorageBackend* storage,
   }
   BACKOFF_FAIL(index_metadata_file->save());
   for (i64 i = 0; i < frame; ++i) {
-    s_write(index_file.get(), i);
+    s_write(index_file.get(), start_row + i);
   }
   BACKOFF_FAIL(index_file->save());
 
-  table_desc.add_end_rows(frame);
+  num_frames = frame;
   video_descriptor.set_frames(frame);
   video_descriptor.set_num_encoded_videos(1);
   video_descriptor.add_frames_per_video(frame);
@@ -420,10 +407,83 @@ bool parse_and_write_video(storehouse::StorageBackend* storage,
   // Save our metadata for the frame column
   write_video_metadata(storage, video_meta);
 
+  return succeeded;
+}
+
+bool parse_and_write_video(storehouse::StorageBackend* storage,
+                           const std::string& table_name, i32 table_id,
+                           const std::string& path,
+                           std::string& error_message) {
+  proto::TableDescriptor table_desc;
+  table_desc.set_id(table_id);
+  table_desc.set_name(table_name);
+  table_desc.set_job_id(-1);
+  table_desc.set_timestamp(
+      std::chrono::duration_cast<std::chrono::seconds>(now().time_since_epoch())
+          .count());
+
+  {
+    Column* index_col = table_desc.add_columns();
+    index_col->set_name(index_column_name());
+    index_col->set_id(0);
+    index_col->set_type(ColumnType::Other);
+
+    Column* frame_col = table_desc.add_columns();
+    frame_col->set_name(frame_column_name());
+    frame_col->set_id(1);
+    frame_col->set_type(ColumnType::Video);
+  }
+
+  i64 frames;
+  if (!parse_and_write_video_item(storage, table_id, 0, 0, path, frames,
+                                  error_message)) {
+    return false;
+  }
+  table_desc.add_end_rows(frames);
+
   // Save the table descriptor
   write_table_metadata(storage, TableMetadata(table_desc));
 
-  return succeeded;
+  return true;
+}
+
+bool append_video(storehouse::StorageBackend* storage, i32 table_id,
+                  const std::string& path, std::string& error_message) {
+  proto::TableDescriptor table_desc =
+      read_table_metadata(storage, TableMetadata::descriptor_path(table_id))
+          .get_descriptor();
+  if (table_desc.columns_size() != 2 ||
+      table_desc.columns(1).type() != ColumnType::Video ||
+      table_desc.job_id() != -1) {
+    error_message = "Can only append to tables of ingested videos";
+    return false;
+  }
+
+  // The new video becomes the next item of the table
+  i32 item_id = table_desc.end_rows_size();
+  i64 start_row = item_id > 0 ? table_desc.end_rows(item_id - 1) : 0;
+  i64 frames;
+  if (!parse_and_write_video_item(storage, table_id, item_id, start_row, path,
+                                  frames, error_message)) {
+    return false;
+  }
+
+  if (item_id > 0) {
+    VideoMetadata last = read_video_metadata(
+        storage, VideoMetadata::descriptor_path(table_id, 1, item_id - 1));
+    VideoMetadata next = read_video_metadata(
+        storage, VideoMetadata::descriptor_path(table_id, 1, item_id));
+    if (last.width() != next.width() || last.height() != next.height()) {
+      error_message = "Appended video has different dimensions than the table";
+      return false;
+    }
+  }
+
+  // Only publish the new rows once the item is completely written
+  table_desc.add_end_rows(start_row + frames);
+  write_table_metadata(storage, TableMetadata(table_desc));
+
+  return true;
 }
 
 // void ingest_images(storehouse::StorageBackend* storage,
@@ -824,6 +884,49 @@ Result ingest_videos(storehouse::StorageConfig* storage_config,
   return result;
 }
 
+Result append_videos(storehouse::StorageConfig* storage_config,
+                     const std::string& db_path,
+                     const std::vector<std::string>& table_names,
+                     const std::vector<std::string>& paths,
+                     std::vector<FailedVideo>& failed_videos) {
+  Result result;
+  result.set_success(true);
+
+  internal::set_database_path(db_path);
+  av_register_all();
+
+  std::unique_ptr<storehouse::StorageBackend> storage{
+      storehouse::StorageBackend::make_from_config(storage_config)};
+
+  internal::DatabaseMetadata meta = internal::read_database_metadata(
+      storage.get(), internal::DatabaseMetadata::descriptor_path());
+  for (size_t i = 0; i < table_names.size(); ++i) {
+    if (!meta.has_table(table_names[i])) {
+      RESULT_ERROR(&result, "Table name %s does not exist in database.",
+                   table_names[i].c_str());
+      return result;
+    }
+  }
+
+  // Videos for the same table are appended in order, so they are ingested
+  // one after another
+  size_t num_bad_videos = 0;
+  for (size_t i = 0; i < table_names.size(); ++i) {
+    std::string error_message;
+    if (!internal::append_video(storage.get(),
+                                meta.get_table_id(table_names[i]), paths[i],
+                                error_message)) {
+      num_bad_videos++;
+      LOG(WARNING) << "Failed to append video " << paths[i] << "!";
+      failed_videos.push_back({paths[i], error_message});
+    }
+  }
+  if (num_bad_videos == table_names.size()) {
+    RESULT_ERROR(&result, "All videos failed to append properly");
+  }
+  return result;
+}
+
 void ingest_images(storehouse::StorageConfig* storage_config,
                    const std::string& db_path, const std::string& table_name,
                    const std::vector<std::string>& paths) {
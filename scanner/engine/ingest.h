@@ -32,6 +32,13 @@ Result ingest_videos(storehouse::StorageConfig* storage_config,
                      const std::vector<std::string>& paths,
                      std::vector<FailedVideo>& failed_videos);
 
+// Appends each video as a new item at the end of an existing video table
+Result append_videos(storehouse::StorageConfig* storage_config,
+                     const std::string& db_path,
+                     const std::vector<std::string>& table_names,
+                     const std::vector<std::string>& paths,
+                     std::vector<FailedVideo>& failed_videos);
+
 // void ingest_images(storehouse::StorageConfig *storage_config,
 //                    const std::string &db_path, const std::string &table_name,
 //                    const std::vector<std::string> &paths);
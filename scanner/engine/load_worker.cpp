@@ -143,6 +143,16 @@ VideoIntervals slice_into_video_intervals(
         valid_frames.clear();
         start_keyframe_index = end_keyframe_index - 1;
         next_keyframe = keyframe_positions[end_keyframe_index];
+      } else if (row == keyframe_positions[end_keyframe_index - 1] &&
+                 !valid_frames.empty() && valid_frames.back() != row - 1) {
+        // Row is a keyframe and the frames between it and the last row are
+        // not needed, so start decoding again from this keyframe instead of
+        // decoding the rest of the previous keyframe's frames
+        info.keyframe_index_intervals.push_back(
+            std::make_tuple(start_keyframe_index, end_keyframe_index - 1));
+        info.valid_frames.push_back(valid_frames);
+        valid_frames.clear();
+        start_keyframe_index = end_keyframe_index - 1;
       }
     }
     valid_frames.push_back(row);
@@ -390,10 +400,21 @@ bool LoadWorker::done() {
 
       size_t buffer_size =
           end_keyframe_byte_offset - start_keyframe_byte_offset;
-      u8* buffer = new_buffer(CPU_DEVICE, buffer_size);
 
       auto io_start = now();
 
+      // If only the keyframe itself is needed, read just its packet so that
+      // none of the frames which depend on it are read or decoded
+      if (intervals.valid_frames[i].size() == 1 &&
+          intervals.valid_frames[i][0] == start_keyframe) {
+        i32 packet_size;
+        u64 size_pos = start_keyframe_byte_offset;
+        s_read(video_file.get(), (u8*)&packet_size, sizeof(i32), size_pos);
+        buffer_size = std::min(buffer_size, sizeof(i32) + packet_size);
+      }
+
+      u8* buffer = new_buffer(CPU_DEVICE, buffer_size);
+
       u64 pos = start_keyframe_byte_offset;
       s_read(video_file.get(), buffer, buffer_size, pos);
 
@@ -29,6 +29,9 @@
 namespace scanner {
 namespace internal {
 namespace {
+// Seconds to wait for a worker to acknowledge that a job was cancelled
+const i64 CANCEL_JOB_TIMEOUT = 10;
+
 void validate_task_set(DatabaseMetadata& meta, const proto::TaskSet& task_set,
                        Result* result) {
   auto& tasks = task_set.tasks();
@@ -41,13 +44,20 @@ void validate_task_set(DatabaseMetadata& meta, const proto::TaskSet& task_set,
                    "tables can not have empty names")
           return;
     }
-    if (meta.has_table(task.output_table_name())) {
+    if (!task.append() && meta.has_table(task.output_table_name())) {
       RESULT_ERROR(result,
                    "Task specified with duplicate output table name. A table "
                    "with name %s already exists.",
                    task.output_table_name().c_str());
       return;
     }
+    if (task.append() && !meta.has_table(task.output_table_name())) {
+      RESULT_ERROR(result,
+                   "Task appends to non-existent table %s. Only existing "
+                   "tables can be appended to.",
+                   task.output_table_name().c_str());
+      return;
+    }
     if (task_output_table_names.count(task.output_table_name()) > 0) {
       RESULT_ERROR(result,
                    "Multiple tasks specified with output table name %s. "
@@ -56,6 +66,37 @@ void validate_task_set(DatabaseMetadata& meta, const proto::TaskSet& task_set,
           return;
     }
     task_output_table_names.insert(task.output_table_name());
+    if (task.append() && task.splits_size() > 0) {
+      RESULT_ERROR(result,
+                   "Task %s appends to a table and splits its outputs. Only "
+                   "tasks which create new tables can be split.",
+                   task.output_table_name().c_str());
+      return;
+    }
+    for (auto& split : task.splits()) {
+      if (split.output_table_name() == "") {
+        RESULT_ERROR(result,
+                     "Task %s specified a split with empty output table "
+                     "name. Output tables can not have empty names",
+                     task.output_table_name().c_str());
+        return;
+      }
+      if (meta.has_table(split.output_table_name())) {
+        RESULT_ERROR(result,
+                     "Task specified with duplicate output table name. A "
+                     "table with name %s already exists.",
+                     split.output_table_name().c_str());
+        return;
+      }
+      if (task_output_table_names.count(split.output_table_name()) > 0) {
+        RESULT_ERROR(result,
+                     "Multiple tasks specified with output table name %s. "
+                     "Table names must be unique.",
+                     split.output_table_name().c_str());
+        return;
+      }
+      task_output_table_names.insert(split.output_table_name());
+    }
     if (task.samples().size() == 0) {
       RESULT_ERROR(result,
                    "Task %s did not specify any tables to sample from. Tasks "
@@ -424,13 +465,19 @@ grpc::Status MasterImpl::IngestVideos(grpc::ServerContext* context,
                                       const proto::IngestParameters* params,
                                       proto::IngestResult* result) {
   std::vector<FailedVideo> failed_videos;
-  result->mutable_result()->CopyFrom(
-      ingest_videos(db_params_.storage_config, db_params_.db_path,
-                    std::vector<std::string>(params->table_names().begin(),
-                                             params->table_names().end()),
-                    std::vector<std::string>(params->video_paths().begin(),
-                                             params->video_paths().end()),
-                    failed_videos));
+  std::vector<std::string> table_names(params->table_names().begin(),
+                                       params->table_names().end());
+  std::vector<std::string> video_paths(params->video_paths().begin(),
+                                       params->video_paths().end());
+  if (params->append()) {
+    result->mutable_result()->CopyFrom(
+        append_videos(db_params_.storage_config, db_params_.db_path,
+                      table_names, video_paths, failed_videos));
+  } else {
+    result->mutable_result()->CopyFrom(
+        ingest_videos(db_params_.storage_config, db_params_.db_path,
+                      table_names, video_paths, failed_videos));
+  }
   for (auto& failed : failed_videos) {
     result->add_failed_paths(failed.path);
     result->add_failed_messages(failed.message);
@@ -506,8 +553,27 @@ grpc::Status MasterImpl::NextWork(grpc::ServerContext* context,
   }
   new_work->mutable_load_work()->set_job_index(std::get<0>(task_sample_id));
 
+  // Tasks which append to a table write after its existing items and rows
+  i64 item_offset, row_offset;
+  std::tie(item_offset, row_offset) =
+      task_output_offsets_.at(std::get<0>(task_sample_id));
+  proto::IOItem* io_item = new_work->mutable_io_item();
+  io_item->set_item_id(io_item->item_id() + item_offset);
+  io_item->set_start_row(io_item->start_row() + row_offset);
+  io_item->set_end_row(io_item->end_row() + row_offset);
+  // Tasks split over several tables write each column to its own table
+  for (auto& output :
+       task_output_columns_.at(std::get<0>(task_sample_id))) {
+    proto::OutputColumn* column = io_item->add_outputs();
+    column->set_index(std::get<0>(output));
+    column->set_table_id(std::get<1>(output));
+    column->set_column_id(std::get<2>(output));
+  }
+
   // Track sample assigned to worker
   active_task_samples_[node_info->node_id()].insert(task_sample_id);
+  task_sample_rows_[task_sample_id] =
+      new_work->io_item().end_row() - new_work->io_item().start_row();
   worker_histories_[node_info->node_id()].tasks_assigned += 1;
 
   return grpc::Status::OK;
@@ -546,6 +612,8 @@ grpc::Status MasterImpl::FinishedWork(
   }
 
   total_samples_used_++;
+  total_rows_used_ += task_sample_rows_.at(task_sample);
+  task_sample_rows_.erase(task_sample);
   if (bar_) {
     bar_->Progressed(total_samples_used_);
   }
@@ -570,29 +638,38 @@ grpc::Status MasterImpl::NewJob(grpc::ServerContext* context,
   job_result->set_success(true);
   set_database_path(db_params_.db_path);
 
-  job_params_.Clear();
-  job_params_.MergeFrom(*job_params);
-  {
-    std::unique_lock<std::mutex> lock(finished_mutex_);
-    finished_ = false;
-  }
-  finished_cv_.notify_one();
-
+  // Jobs are queued and executed one after another in order of submission,
+  // so the next job starts as soon as the current one finishes
   {
     std::unique_lock<std::mutex> lock(active_mutex_);
-    active_job_ = true;
+    job_queue_.push_back(*job_params);
   }
   active_cv_.notify_all();
 
   return grpc::Status::OK;
 }
 
+grpc::Status MasterImpl::NewJobStream(
+    grpc::ServerContext* context,
+    grpc::ServerReader<proto::JobParameters>* reader,
+    proto::Result* job_result) {
+  VLOG(1) << "Master received NewJobStream command";
+  // Later messages only hold tasks, which merging appends to the first
+  proto::JobParameters job_params;
+  proto::JobParameters chunk;
+  while (reader->Read(&chunk)) {
+    job_params.MergeFrom(chunk);
+    chunk.Clear();
+  }
+  return NewJob(context, &job_params, job_result);
+}
+
 grpc::Status MasterImpl::IsJobDone(grpc::ServerContext* context,
                                    const proto::Empty* empty,
                                    proto::JobResult* job_result) {
   VLOG(1) << "Master received IsJobDone command";
   std::unique_lock<std::mutex> lock(active_mutex_);
-  if (!active_job_) {
+  if (!active_job_ && job_queue_.empty()) {
     job_result->set_finished(true);
     job_result->mutable_result()->CopyFrom(job_result_);
   } else {
@@ -602,6 +679,121 @@ grpc::Status MasterImpl::IsJobDone(grpc::ServerContext* context,
 }
 
 
+grpc::Status MasterImpl::GetJobStatus(
+    grpc::ServerContext* context, const proto::JobId* job_id,
+    grpc::ServerWriter<proto::JobStatus>* writer) {
+  VLOG(1) << "Master received GetJobStatus command";
+  const std::string& name = job_id->job_name();
+  i64 last_tasks_done = -1;
+  bool first = true;
+  while (!context->IsCancelled()) {
+    proto::JobStatus status;
+    bool running = false;
+    {
+      // Wake up as soon as the job finishes, or periodically to report
+      // progress
+      std::unique_lock<std::mutex> lock(active_mutex_);
+      if (!first) {
+        active_cv_.wait_for(lock, std::chrono::milliseconds(250), [&] {
+          return finished_job_results_.count(name) > 0;
+        });
+      }
+      auto it = finished_job_results_.find(name);
+      if (it != finished_job_results_.end()) {
+        status.set_finished(true);
+        status.mutable_result()->CopyFrom(it->second);
+      }
+      running = active_job_ && job_params_.job_name() == name;
+      if (running) {
+        // The job processor resets these under active_mutex_ before starting
+        // the next job, so they belong to this job while the lock is held
+        status.set_tasks_done(total_samples_used_);
+        status.set_total_tasks(total_samples_);
+        status.set_rows_done(total_rows_used_);
+        double elapsed =
+            std::chrono::duration<double>(now() - job_start_).count();
+        status.set_rows_per_second(elapsed > 0 ? status.rows_done() / elapsed
+                                               : 0);
+      }
+      bool queued = false;
+      for (auto& params : job_queue_) {
+        queued = queued || params.job_name() == name;
+      }
+      if (!status.finished() && !running && !queued) {
+        status.set_finished(true);
+        RESULT_ERROR(status.mutable_result(), "Job %s does not exist",
+                     name.c_str());
+      }
+    }
+    if (status.finished()) {
+      writer->Write(status);
+      break;
+    }
+    if (first || status.tasks_done() != last_tasks_done) {
+      last_tasks_done = status.tasks_done();
+      if (!writer->Write(status)) {
+        break;
+      }
+    }
+    first = false;
+  }
+  return grpc::Status::OK;
+}
+
+grpc::Status MasterImpl::CancelJob(grpc::ServerContext* context,
+                                   const proto::JobId* job_id,
+                                   proto::Result* result) {
+  VLOG(1) << "Master received CancelJob command";
+  result->set_success(true);
+  const std::string& name = job_id->job_name();
+  // Workers running the cancelled job, which are only told to cancel it after
+  // releasing the lock so that a slow worker does not block other requests
+  std::map<i32, proto::Worker::Stub*> ws;
+  proto::JobId cancelled_job;
+  {
+    std::unique_lock<std::mutex> lock(active_mutex_);
+    bool found = false;
+    auto it = job_queue_.begin();
+    while (it != job_queue_.end()) {
+      if (!name.empty() && it->job_name() != name) {
+        ++it;
+        continue;
+      }
+      proto::Result cancelled;
+      RESULT_ERROR(&cancelled, "Job %s was cancelled",
+                   it->job_name().c_str());
+      record_job_result(it->job_name(), cancelled);
+      it = job_queue_.erase(it);
+      found = true;
+    }
+    if (active_job_ && !job_cancelled_ &&
+        (name.empty() || job_params_.job_name() == name)) {
+      ws = cancel_active_job();
+      cancelled_job.set_job_name(job_params_.job_name());
+      found = true;
+    }
+    if (!found && !name.empty()) {
+      RESULT_ERROR(result, "Job %s is not queued or running", name.c_str());
+    }
+  }
+  active_cv_.notify_all();
+
+  // Workers abandon their in flight work items, but stay registered so they
+  // are ready for the next job
+  for (auto& kv : ws) {
+    grpc::ClientContext context;
+    context.set_deadline(std::chrono::system_clock::now() +
+                         std::chrono::seconds(CANCEL_JOB_TIMEOUT));
+    proto::Result worker_result;
+    grpc::Status status =
+        kv.second->CancelJob(&context, cancelled_job, &worker_result);
+    if (!status.ok()) {
+      LOG(WARNING) << "Could not cancel job on worker " << kv.first << "!";
+    }
+  }
+  return grpc::Status::OK;
+}
+
 grpc::Status MasterImpl::Ping(grpc::ServerContext* context,
                               const proto::Empty* empty1,
                               proto::Empty* empty2) {
@@ -863,14 +1055,31 @@ void MasterImpl::start_watchdog(grpc::Server* server, bool enable_timeout,
 void MasterImpl::start_job_processor() {
   job_processor_thread_ = std::thread([this]() {
     while (!trigger_shutdown_.raised()) {
-      // Wait on not finished
+      // Wait for a job to be queued
       {
         std::unique_lock<std::mutex> lock(active_mutex_);
-        active_cv_.wait(
-            lock, [this] { return active_job_ || trigger_shutdown_.raised(); });
+        active_cv_.wait(lock, [this] {
+          return !job_queue_.empty() || trigger_shutdown_.raised();
+        });
+        if (trigger_shutdown_.raised()) break;
+        job_params_.Clear();
+        job_params_.Swap(&job_queue_.front());
+        job_queue_.pop_front();
+        active_job_ = true;
+        job_cancelled_ = false;
+        // Reset progress while holding active_mutex_ so GetJobStatus never
+        // reports the previous job's counters for this one
+        total_samples_used_ = 0;
+        total_samples_ = 0;
+        total_rows_used_ = 0;
+        job_start_ = now();
+        // Reset while holding active_mutex_ so a cancel cannot be lost
+        std::unique_lock<std::mutex> finished_lock(finished_mutex_);
+        finished_ = false;
       }
-      if (trigger_shutdown_.raised()) break;
+      finished_cv_.notify_one();
       // Start processing job
+      job_result_.Clear();
       bool result = process_job(&job_params_, &job_result_);
     }
   });
@@ -878,10 +1087,6 @@ void MasterImpl::start_job_processor() {
 
 void MasterImpl::stop_job_processor() {
   // Wake up job processor
-  {
-    std::unique_lock<std::mutex> lock(active_mutex_);
-    active_job_ = true;
-  }
   active_cv_.notify_all();
   if (job_processor_thread_.joinable()) {
     job_processor_thread_.join();
@@ -908,20 +1113,20 @@ bool MasterImpl::process_job(const proto::JobParameters* job_params,
   statuses_.clear();
   replies_.clear();
   rpcs_.clear();
-  total_samples_used_ = 0;
-  total_samples_ = 0;
+  task_sample_rows_.clear();
 
   job_result->set_success(true);
 
-  auto finished_fn = [this]() {
+  auto finished_fn = [this, job_params, job_result]() {
     {
       std::unique_lock<std::mutex> lock(finished_mutex_);
       finished_ = true;
     }
     finished_cv_.notify_all();
     {
-      std::unique_lock<std::mutex> lock(finished_mutex_);
+      std::unique_lock<std::mutex> lock(active_mutex_);
       active_job_ = false;
+      record_job_result(job_params->job_name(), *job_result);
     }
     active_cv_.notify_all();
   };
@@ -1047,19 +1252,95 @@ bool MasterImpl::process_job(const proto::JobParameters* job_params,
   i64 min_stencil, max_stencil;
   std::tie(min_stencil, max_stencil) =
       determine_stencil_bounds(job_params->task_set());
+  // Tables which are appended to are modified in place, so keep their old
+  // descriptors around in case the job fails
+  std::vector<TableMetadata> appended_tables;
+  task_output_offsets_.clear();
+  task_output_columns_.clear();
   for (auto& task : job_params->task_set().tasks()) {
-    i32 table_id = meta_.add_table(task.output_table_name());
     proto::TableDescriptor table_desc;
-    table_desc.set_id(table_id);
-    table_desc.set_name(task.output_table_name());
-    table_desc.set_timestamp(std::chrono::duration_cast<std::chrono::seconds>(
-                                 now().time_since_epoch())
-                                 .count());
-    // Set columns equal to the last op's output columns
-    for (size_t i = 0; i < output_columns.size(); ++i) {
-      Column* col = table_desc.add_columns();
-      col->CopyFrom(output_columns[i]);
+    i64 item_offset = 0;
+    i64 row_offset = 0;
+    // Tasks with splits only write the listed columns to each table, after
+    // the index column
+    std::vector<i32> task_columns = {0};
+    std::vector<std::vector<i32>> split_columns;
+    if (task.splits_size() > 0) {
+      task_columns.insert(task_columns.end(), task.columns().begin(),
+                          task.columns().end());
+    } else {
+      for (size_t i = 1; i < output_columns.size(); ++i) {
+        task_columns.push_back(i);
+      }
     }
+    for (auto& split : task.splits()) {
+      split_columns.emplace_back(1, 0);
+      split_columns.back().insert(split_columns.back().end(),
+                                  split.columns().begin(),
+                                  split.columns().end());
+    }
+    for (auto& columns : split_columns) {
+      for (i32 c : columns) {
+        if (c < 0 || c >= (i32)output_columns.size()) {
+          RESULT_ERROR(job_result,
+                       "Task %s specified output column %d for a split but "
+                       "the job only has %lu output columns.",
+                       task.output_table_name().c_str(), c,
+                       output_columns.size());
+        }
+      }
+    }
+    for (i32 c : task_columns) {
+      if (c < 0 || c >= (i32)output_columns.size()) {
+        RESULT_ERROR(job_result,
+                     "Task %s specified output column %d but the job only "
+                     "has %lu output columns.",
+                     task.output_table_name().c_str(), c,
+                     output_columns.size());
+      }
+    }
+    if (!job_result->success()) {
+      break;
+    }
+    // (output column, table id, column id) of each written column
+    std::vector<std::tuple<i32, i32, i32>> column_outputs;
+    if (task.append()) {
+      // Output rows become new items after the existing items of the table
+      i32 table_id = meta_.get_table_id(task.output_table_name());
+      TableMetadata old_table = read_table_metadata(
+          storage_, TableMetadata::descriptor_path(table_id));
+      table_desc = old_table.get_descriptor();
+      appended_tables.push_back(old_table);
+      if (table_desc.columns_size() != (i32)output_columns.size()) {
+        RESULT_ERROR(job_result,
+                     "Can not append to table %s since it has different "
+                     "columns than the job outputs.",
+                     task.output_table_name().c_str());
+        break;
+      }
+      item_offset = table_desc.end_rows_size();
+      row_offset = old_table.num_rows();
+    } else {
+      i32 table_id = meta_.add_table(task.output_table_name());
+      table_desc.set_id(table_id);
+      table_desc.set_name(task.output_table_name());
+      table_desc.set_timestamp(
+          std::chrono::duration_cast<std::chrono::seconds>(
+              now().time_since_epoch())
+              .count());
+      // Set columns equal to the last op's output columns
+      for (i32 i : task_columns) {
+        Column* col = table_desc.add_columns();
+        col->CopyFrom(output_columns[i]);
+        col->set_id(table_desc.columns_size() - 1);
+        if (task.splits_size() > 0) {
+          column_outputs.push_back(std::make_tuple(i, table_id, col->id()));
+        }
+      }
+    }
+    table_desc.set_fingerprint(task.fingerprint());
+    table_desc.set_ops_fingerprint(task.ops_fingerprint());
+    task_output_offsets_.push_back(std::make_tuple(item_offset, row_offset));
     table_metas_->update(TableMetadata(table_desc));
     std::vector<i64> end_rows;
     Result result = get_task_end_rows(*table_metas_.get(), task, min_stencil,
@@ -1070,15 +1351,41 @@ bool MasterImpl::process_job(const proto::JobParameters* job_params,
     }
     total_samples_ += end_rows.size();
     for (i64 r : end_rows) {
-      table_desc.add_end_rows(r);
+      table_desc.add_end_rows(row_offset + r);
     }
     table_desc.set_job_id(job_id);
 
     write_table_metadata(storage_, TableMetadata(table_desc));
     table_metas_->update(TableMetadata(table_desc));
+
+    // Split tables have the same rows as the task's output table
+    for (size_t s = 0; s < split_columns.size(); ++s) {
+      auto& split = task.splits(s);
+      proto::TableDescriptor split_desc;
+      i32 table_id = meta_.add_table(split.output_table_name());
+      split_desc.set_id(table_id);
+      split_desc.set_name(split.output_table_name());
+      split_desc.set_timestamp(table_desc.timestamp());
+      for (i32 i : split_columns[s]) {
+        Column* col = split_desc.add_columns();
+        col->CopyFrom(output_columns[i]);
+        col->set_id(split_desc.columns_size() - 1);
+        column_outputs.push_back(std::make_tuple(i, table_id, col->id()));
+      }
+      split_desc.set_fingerprint(split.fingerprint());
+      split_desc.mutable_end_rows()->CopyFrom(table_desc.end_rows());
+      split_desc.set_job_id(job_id);
+
+      write_table_metadata(storage_, TableMetadata(split_desc));
+      table_metas_->update(TableMetadata(split_desc));
+    }
+    task_output_columns_.push_back(column_outputs);
   }
   if (!job_result->success()) {
     // No database changes made at this point, so just return
+    for (auto& table : appended_tables) {
+      write_table_metadata(storage_, table);
+    }
     finished_fn();
     return false;
   }
@@ -1123,11 +1430,16 @@ bool MasterImpl::process_job(const proto::JobParameters* job_params,
 
   {
     std::unique_lock<std::mutex> lk(work_mutex_);
-    for (auto kv : worker_addresses_) {
-      i32 worker_id = kv.first;
-      std::string& address = kv.second;
+    // The job may have been cancelled while it was being set up
+    if (job_cancelled_) {
+      next_task_ = num_tasks_;
+    } else {
+      for (auto kv : worker_addresses_) {
+        i32 worker_id = kv.first;
+        std::string& address = kv.second;
 
-      start_job_on_worker(worker_id, address);
+        start_job_on_worker(worker_id, address);
+      }
     }
   }
 
@@ -1185,15 +1497,23 @@ bool MasterImpl::process_job(const proto::JobParameters* job_params,
   // No need to check status of workers anymore
   stop_worker_pinger();
 
+  if (job_cancelled_) {
+    RESULT_ERROR(job_result, "Job %s was cancelled",
+                 job_params->job_name().c_str());
+  }
   if (!job_result->success()) {
-    // Overwrite database metadata with copy from prior to modification
+    // Overwrite database metadata with copy from prior to modification, which
+    // discards the output tables of failed or cancelled jobs
     write_database_metadata(storage_, meta_copy);
+    for (auto& table : appended_tables) {
+      write_table_metadata(storage_, table);
+    }
   }
   if (!task_result_.success()) {
     job_result->CopyFrom(task_result_);
   } else {
     assert(next_task_ == num_tasks_);
-    if (bar_) {
+    if (bar_ && !job_cancelled_) {
       bar_->Progressed(total_samples_);
     }
   }
@@ -1206,6 +1526,50 @@ bool MasterImpl::process_job(const proto::JobParameters* job_params,
   VLOG(1) << "Master finished job";
 }
 
+std::map<i32, proto::Worker::Stub*> MasterImpl::cancel_active_job() {
+  job_cancelled_ = true;
+
+  // Stop handing out work so that workers only have to drain the work items
+  // they already hold
+  std::map<i32, proto::Worker::Stub*> ws;
+  {
+    std::unique_lock<std::mutex> lk(work_mutex_);
+    next_task_ = num_tasks_;
+    next_sample_ = num_samples_;
+    unallocated_task_samples_.clear();
+    for (auto& kv : workers_) {
+      i32 worker_id = kv.first;
+      if (!worker_active_[worker_id]) continue;
+
+      ws.insert({worker_id, kv.second.get()});
+    }
+  }
+
+  // The job processor still waits for every worker to return from the job,
+  // so it finishes once the workers have been cancelled
+  {
+    std::unique_lock<std::mutex> lock(finished_mutex_);
+    finished_ = true;
+  }
+  finished_cv_.notify_all();
+  return ws;
+}
+
+void MasterImpl::record_job_result(const std::string& job_name,
+                                   const proto::Result& result) {
+  // Only remember the most recent results, since each is only needed until
+  // the client which submitted the job hears about it
+  const size_t max_results = 1024;
+  if (finished_job_results_.count(job_name) == 0) {
+    finished_job_names_.push_back(job_name);
+  }
+  finished_job_results_[job_name].CopyFrom(result);
+  while (finished_job_names_.size() > max_results) {
+    finished_job_results_.erase(finished_job_names_.front());
+    finished_job_names_.pop_front();
+  }
+}
+
 void MasterImpl::start_worker_pinger() {
   while (!finished_) {
     std::map<i32, proto::Worker::Stub*> ws;
@@ -1247,8 +1611,16 @@ void MasterImpl::stop_worker_pinger() {
 
 void MasterImpl::start_job_on_worker(i32 worker_id,
                                      const std::string& address) {
+  // Workers are handed tasks through NextWork and read the output column
+  // types from the job descriptor, so they do not use the task list. Only the
+  // first task is sent to keep the request small.
   proto::JobParameters w_job_params;
   w_job_params.MergeFrom(job_params_);
+  i32 num_tasks = w_job_params.task_set().tasks_size();
+  if (num_tasks > 1) {
+    w_job_params.mutable_task_set()->mutable_tasks()->DeleteSubrange(
+        1, num_tasks - 1);
+  }
 
   auto& worker = workers_.at(worker_id);
   std::vector<std::string> split_addr = split(address, ':');
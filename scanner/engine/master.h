@@ -22,6 +22,7 @@
 #include "scanner/util/progress_bar.h"
 #include "scanner/util/util.h"
 
+#include <deque>
 #include <mutex>
 #include <thread>
 
@@ -68,10 +69,22 @@ class MasterImpl final : public proto::Master::Service {
                       const proto::JobParameters* job_params,
                       proto::Result* job_result);
 
+  grpc::Status NewJobStream(
+      grpc::ServerContext* context,
+      grpc::ServerReader<proto::JobParameters>* reader,
+      proto::Result* job_result);
+
   grpc::Status IsJobDone(grpc::ServerContext* context,
                          const proto::Empty* empty,
                          proto::JobResult* job_result);
 
+  grpc::Status GetJobStatus(grpc::ServerContext* context,
+                            const proto::JobId* job_id,
+                            grpc::ServerWriter<proto::JobStatus>* writer);
+
+  grpc::Status CancelJob(grpc::ServerContext* context,
+                         const proto::JobId* job_id, proto::Result* result);
+
   grpc::Status Ping(grpc::ServerContext* context, const proto::Empty* empty1,
                     proto::Empty* empty2);
 
@@ -108,6 +121,14 @@ class MasterImpl final : public proto::Master::Service {
   bool process_job(const proto::JobParameters* job_params,
                    proto::Result* job_result);
 
+  // Must be called with active_mutex_ held. Stops handing out work for the
+  // active job and returns the workers which still have to cancel it.
+  std::map<i32, proto::Worker::Stub*> cancel_active_job();
+
+  // Must be called with active_mutex_ held
+  void record_job_result(const std::string& job_name,
+                         const proto::Result& result);
+
   void start_worker_pinger();
 
   void stop_worker_pinger();
@@ -136,13 +157,22 @@ class MasterImpl final : public proto::Master::Service {
   std::vector<proto::OpRegistration> op_registrations_;
   std::vector<proto::PythonKernelRegistration> py_kernel_registrations_;
 
-  i64 total_samples_used_;
-  i64 total_samples_;
+  std::atomic<i64> total_samples_used_;
+  std::atomic<i64> total_samples_;
+  std::atomic<i64> total_rows_used_;
+  timepoint_t job_start_;
 
   // True if the master is executing a job
   std::mutex active_mutex_;
   std::condition_variable active_cv_;
   bool active_job_ = false;
+  // True if the active job was cancelled
+  std::atomic<bool> job_cancelled_{false};
+  // Jobs waiting to be executed, in order of submission
+  std::deque<proto::JobParameters> job_queue_;
+  // Job name -> result, for the most recently finished jobs
+  std::map<std::string, proto::Result> finished_job_results_;
+  std::deque<std::string> finished_job_names_;
 
   // True if all work for job is done
   std::mutex finished_mutex_;
@@ -170,6 +200,13 @@ class MasterImpl final : public proto::Master::Service {
   Result task_result_;
   // Worker id -> (task_id, sample_id)
   std::map<i64, std::set<std::tuple<i64, i64>>> active_task_samples_;
+  // (task_id, sample_id) -> rows in sample, for samples handed to workers
+  std::map<std::tuple<i64, i64>, i64> task_sample_rows_;
+  // Task id -> (first item, first row) of its output in the output table
+  std::vector<std::tuple<i64, i64>> task_output_offsets_;
+  // Task id -> (output column, table id, column id) for tasks whose outputs
+  // are split over several tables
+  std::vector<std::vector<std::tuple<i32, i32, i32>>> task_output_columns_;
   // Track assignment of tasks to worker for this job
   struct WorkerHistory {
     timepoint_t start_time;
@@ -298,6 +298,9 @@ JobMetadata::JobMetadata(const JobDescriptor& job) : Metadata(job) {
   }
   for (auto& t : descriptor_.tasks()) {
     table_names_.push_back(t.output_table_name());
+    for (auto& split : t.splits()) {
+      table_names_.push_back(split.output_table_name());
+    }
   }
 }
 
@@ -14,9 +14,11 @@
  */
 
 #include "scanner/engine/sampler.h"
+#include "scanner/engine/video_index_entry.h"
 #include "scanner/metadata.pb.h"
 
 #include <cmath>
+#include <random>
 #include <vector>
 
 namespace scanner {
@@ -25,7 +27,8 @@ namespace internal {
 namespace {
 
 using SamplerFactory =
-    std::function<Sampler*(const std::vector<u8>&, const TableMetadata&)>;
+    std::function<Sampler*(const std::vector<u8>&, const TableMetadata&,
+                           storehouse::StorageBackend*)>;
 
 class AllSampler : public Sampler {
  public:
@@ -207,7 +210,16 @@ class GatherSampler : public Sampler {
     }
     for (i32 i = 0; i < args_.samples_size(); ++i) {
       auto& s = args_.samples(i);
-      i64 rows = args_.samples(i).rows_size();
+      if (s.run_gaps_size() != s.run_lengths_size()) {
+        RESULT_ERROR(&valid_,
+                     "Gather sample %d has %d run gaps but %d run lengths", i,
+                     s.run_gaps_size(), s.run_lengths_size());
+        return;
+      }
+      i64 rows = s.rows_size();
+      for (i64 length : s.run_lengths()) {
+        rows += length;
+      }
       offset_at_sample_.push_back(total_rows_);
       total_rows_ += rows;
     }
@@ -229,10 +241,18 @@ class GatherSampler : public Sampler {
 
   RowSample sample_at(i64 sample_idx) override {
     RowSample sample;
-    auto& s = args_.samples(curr_sample_idx_);
+    auto& s = args_.samples(sample_idx);
     sample.warmup_rows =
         std::vector<i64>(s.warmup_rows().begin(), s.warmup_rows().end());
     sample.rows = std::vector<i64>(s.rows().begin(), s.rows().end());
+    i64 run_end = 0;
+    for (i32 i = 0; i < s.run_gaps_size(); ++i) {
+      i64 run_start = run_end + s.run_gaps(i);
+      run_end = run_start + s.run_lengths(i);
+      for (i64 r = run_start; r < run_end; ++r) {
+        sample.rows.push_back(r);
+      }
+    }
     return sample;
   }
 
@@ -249,22 +269,271 @@ class GatherSampler : public Sampler {
   i64 curr_sample_idx_ = 0;
 };
 
+// Reads the table rows of every keyframe of an h264 video column
+Result read_keyframe_rows(storehouse::StorageBackend* storage,
+                          const TableMetadata& table, const std::string& column,
+                          std::vector<i64>& rows) {
+  Result result;
+  result.set_success(true);
+  i32 column_id = -1;
+  for (auto& col : table.columns()) {
+    if (col.name() == column) {
+      column_id = col.id();
+    }
+  }
+  if (column_id == -1) {
+    RESULT_ERROR(&result, "Keyframe column %s does not exist", column.c_str());
+    return result;
+  }
+  if (table.column_type(column_id) != ColumnType::Video) {
+    RESULT_ERROR(&result, "Keyframe column %s is not a video column",
+                 column.c_str());
+    return result;
+  }
+  // Keyframe positions are relative to each item, so offset them by the
+  // starting row of the item. The last position is the item's frame count.
+  std::vector<i64> end_rows = table.end_rows();
+  i64 item_start = 0;
+  for (i32 item_id = 0; item_id < end_rows.size(); ++item_id) {
+    VideoIndexEntry entry =
+        read_video_index(storage, table.id(), column_id, item_id);
+    if (entry.codec_type != proto::VideoDescriptor::H264) {
+      RESULT_ERROR(&result, "Keyframe column %s is not h264 encoded",
+                   column.c_str());
+      return result;
+    }
+    for (size_t i = 0; i < entry.keyframe_positions.size() - 1; ++i) {
+      rows.push_back(item_start + entry.keyframe_positions[i]);
+    }
+    item_start = end_rows[item_id];
+  }
+  return result;
+}
+
+// Splits sorted rows into samples of about sample_size rows, keeping the rows
+// which decode from the same keyframe in the same sample. Returns the index
+// of the first row of each sample followed by the number of rows.
+std::vector<i64> split_on_keyframes(const std::vector<i64>& rows,
+                                    const std::vector<i64>& keyframes,
+                                    i64 sample_size) {
+  std::vector<i64> splits = {0};
+  if (rows.empty()) {
+    return splits;
+  }
+  size_t k = 0;
+  i64 prev = 0;
+  for (size_t i = 0; i < rows.size(); ++i) {
+    while (k < keyframes.size() && keyframes[k] <= rows[i]) {
+      k++;
+    }
+    bool new_group = i > 0 && (keyframes.empty() || k == 0 ||
+                               keyframes[k - 1] > rows[i - 1]);
+    if (new_group) {
+      if ((i64)i - splits.back() > sample_size && prev > splits.back()) {
+        splits.push_back(prev);
+      }
+      prev = i;
+    }
+  }
+  i64 num_rows = rows.size();
+  if (num_rows - splits.back() > sample_size && prev > splits.back()) {
+    splits.push_back(prev);
+  }
+  splits.push_back(num_rows);
+  return splits;
+}
+
+class KeyframeSampler : public Sampler {
+ public:
+  KeyframeSampler(const std::vector<u8>& args, const TableMetadata& table,
+                  storehouse::StorageBackend* storage)
+    : Sampler("Keyframe", table) {
+    valid_.set_success(true);
+    if (!args_.ParseFromArray(args.data(), args.size())) {
+      RESULT_ERROR(&valid_,
+                   "Keyframe sampler provided with invalid protobuf args");
+      return;
+    }
+    if (args_.sample_size() <= 0) {
+      RESULT_ERROR(&valid_,
+                   "Keyframe sampler sample size (%ld) must be greater than 0",
+                   args_.sample_size());
+      return;
+    }
+    valid_ = read_keyframe_rows(storage, table_, args_.column(), rows_);
+    if (!valid_.success()) {
+      return;
+    }
+    for (i64 i = 0; i < rows_.size(); i += args_.sample_size()) {
+      offset_at_sample_.push_back(i);
+    }
+    total_samples_ = offset_at_sample_.size();
+  }
+
+  Result validate() override { return valid_; }
+
+  i64 total_rows() const override { return rows_.size(); }
+
+  i64 total_samples() const override { return total_samples_; }
+
+  RowSample next_sample() override {
+    assert(curr_sample_idx_ < total_samples_);
+    return sample_at(curr_sample_idx_++);
+  }
+
+  void reset() override { curr_sample_idx_ = 0; }
+
+  RowSample sample_at(i64 sample_idx) override {
+    i64 s = offset_at_sample_.at(sample_idx);
+    i64 e = std::min(total_rows(), s + args_.sample_size());
+    RowSample sample;
+    sample.rows = std::vector<i64>(rows_.begin() + s, rows_.begin() + e);
+    return sample;
+  }
+
+  i64 offset_at_sample(i64 sample_idx) const override {
+    return offset_at_sample_.at(sample_idx);
+  }
+
+ private:
+  Result valid_;
+  proto::KeyframeSamplerArgs args_;
+  std::vector<i64> rows_;
+  i64 total_samples_ = 0;
+  std::vector<i64> offset_at_sample_;
+  i64 curr_sample_idx_ = 0;
+};
+
+class RandomSampler : public Sampler {
+ public:
+  RandomSampler(const std::vector<u8>& args, const TableMetadata& table,
+                storehouse::StorageBackend* storage)
+    : Sampler("Random", table) {
+    valid_.set_success(true);
+    if (!args_.ParseFromArray(args.data(), args.size())) {
+      RESULT_ERROR(&valid_,
+                   "Random sampler provided with invalid protobuf args");
+      return;
+    }
+    if (args_.sample_size() <= 0) {
+      RESULT_ERROR(&valid_,
+                   "Random sampler sample size (%ld) must be greater than 0",
+                   args_.sample_size());
+      return;
+    }
+    if (args_.fraction() < 0 || args_.fraction() > 1) {
+      RESULT_ERROR(&valid_,
+                   "Random sampler fraction (%f) must be between 0 and 1",
+                   args_.fraction());
+      return;
+    }
+    if (args_.count() < 0 || args_.bucket_size() < 0) {
+      RESULT_ERROR(&valid_,
+                   "Random sampler count (%ld) and bucket size (%ld) must be "
+                   "non-negative",
+                   args_.count(), args_.bucket_size());
+      return;
+    }
+    // Mix the table id into the seed so that every table of a collection
+    // draws different rows. Uniforms are built from the raw generator output
+    // since std distributions differ between standard libraries.
+    std::mt19937_64 gen(args_.seed() ^
+                        ((u64)table_.id() * 0x9E3779B97F4A7C15ull));
+    i64 num_rows = table_.num_rows();
+    i64 bucket_size =
+        args_.bucket_size() > 0 ? args_.bucket_size() : num_rows;
+    for (i64 s = 0; s < num_rows; s += bucket_size) {
+      i64 e = std::min(num_rows, s + bucket_size);
+      i64 needed = args_.count() > 0
+                       ? std::min(args_.count(), e - s)
+                       : (i64)std::round(args_.fraction() * (e - s));
+      // Selection sampling (Knuth's Algorithm S) draws rows in order
+      for (i64 r = s; r < e && needed > 0; ++r) {
+        double u = (gen() >> 11) * (1.0 / 9007199254740992.0);
+        if ((e - r) * u < needed) {
+          rows_.push_back(r);
+          needed--;
+        }
+      }
+    }
+    std::vector<i64> keyframes;
+    if (!args_.keyframe_column().empty()) {
+      valid_ = read_keyframe_rows(storage, table_, args_.keyframe_column(),
+                                  keyframes);
+      if (!valid_.success()) {
+        return;
+      }
+      splits_ = split_on_keyframes(rows_, keyframes, args_.sample_size());
+    } else {
+      for (i64 i = 0; i < rows_.size(); i += args_.sample_size()) {
+        splits_.push_back(i);
+      }
+      splits_.push_back(rows_.size());
+    }
+    total_samples_ = splits_.size() - 1;
+  }
+
+  Result validate() override { return valid_; }
+
+  i64 total_rows() const override { return rows_.size(); }
+
+  i64 total_samples() const override { return total_samples_; }
+
+  RowSample next_sample() override {
+    assert(curr_sample_idx_ < total_samples_);
+    return sample_at(curr_sample_idx_++);
+  }
+
+  void reset() override { curr_sample_idx_ = 0; }
+
+  RowSample sample_at(i64 sample_idx) override {
+    RowSample sample;
+    sample.rows = std::vector<i64>(rows_.begin() + splits_.at(sample_idx),
+                                   rows_.begin() + splits_.at(sample_idx + 1));
+    return sample;
+  }
+
+  i64 offset_at_sample(i64 sample_idx) const override {
+    return splits_.at(sample_idx);
+  }
+
+ private:
+  Result valid_;
+  proto::RandomSamplerArgs args_;
+  std::vector<i64> rows_;
+  std::vector<i64> splits_;
+  i64 total_samples_ = 0;
+  i64 curr_sample_idx_ = 0;
+};
+
 template <typename T>
 SamplerFactory make_factory() {
-  return [](const std::vector<u8>& args, const TableMetadata& table) {
+  return [](const std::vector<u8>& args, const TableMetadata& table,
+            storehouse::StorageBackend* storage) {
     return new T(args, table);
   };
 }
+
+template <typename T>
+SamplerFactory make_storage_factory() {
+  return [](const std::vector<u8>& args, const TableMetadata& table,
+            storehouse::StorageBackend* storage) {
+    return new T(args, table, storage);
+  };
+}
 }
 
 Result make_sampler_instance(const std::string& sampler_type,
                              const std::vector<u8>& sampler_args,
                              const TableMetadata& sampled_table,
+                             storehouse::StorageBackend* storage,
                              Sampler*& sampler) {
   static std::map<std::string, SamplerFactory> samplers = {
       {"All", make_factory<AllSampler>()},
       {"StridedRange", make_factory<StridedRangeSampler>()},
-      {"Gather", make_factory<GatherSampler>()}};
+      {"Gather", make_factory<GatherSampler>()},
+      {"Keyframe", make_storage_factory<KeyframeSampler>()},
+      {"Random", make_storage_factory<RandomSampler>()}};
 
   Result result;
   result.set_success(true);
@@ -278,7 +547,7 @@ Result make_sampler_instance(const std::string& sampler_type,
 
   // Validate sampler args
   SamplerFactory factory = it->second;
-  Sampler* potential_sampler = factory(sampler_args, sampled_table);
+  Sampler* potential_sampler = factory(sampler_args, sampled_table, storage);
   result = potential_sampler->validate();
   if (!result.success()) {
     delete potential_sampler;
@@ -311,7 +580,7 @@ TaskSampler::TaskSampler(
                                  sample.sampling_args().end());
     Sampler* sampler = nullptr;
     valid_ = make_sampler_instance(sample.sampling_function(), sampler_args,
-                                   t_meta, sampler);
+                                   t_meta, table_metas.storage(), sampler);
     if (!valid_.success()) {
       return;
     }
@@ -31,6 +31,8 @@ namespace internal {
    - Range: select all rows within [start, end)
    - Strided Range: select every Nth row within [start, end)
    - Gather: select arbitrary set of rows
+   - Keyframe: select only the rows which are keyframes of a video column
+   - Random: select a seeded random subset of rows (optionally per bucket)
 
    Requiring access to more than metadata:
    - Filter: select all rows where some predicate holds on one of the columns
@@ -72,6 +74,7 @@ class Sampler {
 Result make_sampler_instance(const std::string& sampler_type,
                              const std::vector<u8>& sampler_args,
                              const TableMetadata& sampled_table,
+                             storehouse::StorageBackend* storage,
                              Sampler*& sampler);
 
 class TaskSampler {
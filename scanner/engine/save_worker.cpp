@@ -61,35 +61,38 @@ void SaveWorker::feed(std::tuple<IOItem, EvalWorkEntry>& input_entry) {
   IOItem& io_item = std::get<0>(input_entry);
   EvalWorkEntry& work_entry = std::get<1>(input_entry);
 
-  // Write out each output column to an individual data file
-  i32 video_col_idx = 0;
+  // Ensure the data is on the CPU
   for (size_t out_idx = 0; out_idx < work_entry.columns.size(); ++out_idx) {
+    move_if_different_address_space(profiler_,
+                                    work_entry.column_handles[out_idx],
+                                    CPU_DEVICE, work_entry.columns[out_idx]);
+  }
+
+  // Write out each output column to an individual data file
+  for (size_t file_idx = 0; file_idx < output_.size(); ++file_idx) {
+    i32 out_idx, frame_idx, video_meta_idx;
+    std::tie(out_idx, frame_idx, video_meta_idx) = output_columns_[file_idx];
     u64 num_elements = static_cast<u64>(work_entry.columns[out_idx].size());
 
     auto io_start = now();
 
-    WriteFile* output_file = output_.at(out_idx).get();
-    WriteFile* output_metadata_file = output_metadata_.at(out_idx).get();
+    WriteFile* output_file = output_.at(file_idx).get();
+    WriteFile* output_metadata_file = output_metadata_.at(file_idx).get();
 
     if (work_entry.columns[out_idx].size() != num_elements) {
       LOG(FATAL) << "Output layer's element vector has wrong length";
     }
 
-    // Ensure the data is on the CPU
-    move_if_different_address_space(profiler_,
-                                    work_entry.column_handles[out_idx],
-                                    CPU_DEVICE, work_entry.columns[out_idx]);
-
     bool compressed = work_entry.compressed[out_idx];
     // If this is a video...
     i64 size_written = 0;
     if (work_entry.column_types[out_idx] == ColumnType::Video) {
       // Read frame info column
       assert(work_entry.columns[out_idx].size() > 0);
-      FrameInfo frame_info = work_entry.frame_sizes[video_col_idx];
+      FrameInfo frame_info = work_entry.frame_sizes[frame_idx];
 
       // Create index column
-      VideoMetadata& video_meta = video_metadata_[video_col_idx];
+      VideoMetadata& video_meta = video_metadata_[video_meta_idx];
       proto::VideoDescriptor& video_descriptor = video_meta.get_descriptor();
 
       video_descriptor.set_width(frame_info.width());
@@ -170,8 +173,6 @@ void SaveWorker::feed(std::tuple<IOItem, EvalWorkEntry>& input_entry) {
           size_written += buffer_size;
         }
       }
-
-      video_col_idx++;
     } else {
       // Write number of elements in the file
       s_write(output_metadata_file, num_elements);
@@ -190,15 +191,17 @@ void SaveWorker::feed(std::tuple<IOItem, EvalWorkEntry>& input_entry) {
       }
     }
 
-    // TODO(apoms): For now, all evaluators are expected to return CPU
-    //   buffers as output so just assume CPU
-    for (size_t i = 0; i < num_elements; ++i) {
-      delete_element(CPU_DEVICE, work_entry.columns[out_idx][i]);
-    }
-
     profiler_.add_interval("io", io_start, now());
     profiler_.increment("io_write", size_written);
   }
+
+  // TODO(apoms): For now, all evaluators are expected to return CPU
+  //   buffers as output so just assume CPU
+  for (size_t out_idx = 0; out_idx < work_entry.columns.size(); ++out_idx) {
+    for (auto& element : work_entry.columns[out_idx]) {
+      delete_element(CPU_DEVICE, element);
+    }
+  }
 }
 
 void SaveWorker::new_task(IOItem item, std::vector<ColumnType> column_types) {
@@ -215,14 +218,41 @@ void SaveWorker::new_task(IOItem item, std::vector<ColumnType> column_types) {
   output_.clear();
   output_metadata_.clear();
   video_metadata_.clear();
+  output_columns_.clear();
 
   profiler_.add_interval("io", io_start, now());
 
-  for (size_t out_idx = 0; out_idx < column_types.size(); ++out_idx) {
+  // Tasks split over several tables list where each output column goes.
+  // Otherwise every column is written to the output table of the task.
+  std::vector<std::tuple<i32, i32, i32>> outputs;
+  if (item.outputs_size() > 0) {
+    for (auto& output : item.outputs()) {
+      outputs.push_back(std::make_tuple(output.index(), output.table_id(),
+                                        output.column_id()));
+    }
+  } else {
+    for (size_t out_idx = 0; out_idx < column_types.size(); ++out_idx) {
+      outputs.push_back(
+          std::make_tuple((i32)out_idx, item.table_id(), (i32)out_idx));
+    }
+  }
+  // Position of each video column among the video columns of the outputs
+  std::vector<i32> frame_indices;
+  i32 num_video_columns = 0;
+  for (ColumnType type : column_types) {
+    frame_indices.push_back(num_video_columns);
+    if (type == ColumnType::Video) {
+      num_video_columns++;
+    }
+  }
+
+  for (auto& output : outputs) {
+    i32 out_idx, table_id, column_id;
+    std::tie(out_idx, table_id, column_id) = output;
     const std::string output_path =
-        table_item_output_path(item.table_id(), out_idx, item.item_id());
+        table_item_output_path(table_id, column_id, item.item_id());
     const std::string output_metdata_path = table_item_metadata_path(
-        item.table_id(), out_idx, item.item_id());
+        table_id, column_id, item.item_id());
 
     WriteFile* output_file = nullptr;
     BACKOFF_FAIL(storage_->make_write_file(output_path, output_file));
@@ -233,15 +263,19 @@ void SaveWorker::new_task(IOItem item, std::vector<ColumnType> column_types) {
         storage_->make_write_file(output_metdata_path, output_metadata_file));
     output_metadata_.emplace_back(output_metadata_file);
 
+    i32 video_meta_idx = -1;
     if (column_types[out_idx] == ColumnType::Video) {
+      video_meta_idx = video_metadata_.size();
       video_metadata_.emplace_back();
 
       VideoMetadata& video_meta = video_metadata_.back();
       proto::VideoDescriptor& video_descriptor = video_meta.get_descriptor();
-      video_descriptor.set_table_id(item.table_id());
-      video_descriptor.set_column_id(out_idx);
+      video_descriptor.set_table_id(table_id);
+      video_descriptor.set_column_id(column_id);
       video_descriptor.set_item_id(item.item_id());
     }
+    output_columns_.push_back(
+        std::make_tuple(out_idx, frame_indices[out_idx], video_meta_idx));
   }
 }
 }
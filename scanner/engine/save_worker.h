@@ -52,6 +52,8 @@ class SaveWorker {
   std::vector<std::unique_ptr<storehouse::WriteFile>> output_;
   std::vector<std::unique_ptr<storehouse::WriteFile>> output_metadata_;
   std::vector<VideoMetadata> video_metadata_;
+  // (output column, frame info index, video metadata index) of each file
+  std::vector<std::tuple<i32, i32, i32>> output_columns_;
 
   // Continuation state
   bool first_item_;
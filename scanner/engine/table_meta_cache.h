@@ -34,6 +34,8 @@ class TableMetaCache {
 
   void update(const TableMetadata& meta);
 
+  storehouse::StorageBackend* storage() const { return storage_; }
+
  private:
   void memoized_read(const std::string& table_name) const;
 
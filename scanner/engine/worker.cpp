@@ -90,8 +90,8 @@ AnalysisResults analyze_dag(const proto::TaskSet& task_set) {
     auto& input_op = ops.Get(0);
     for (const std::string& input_col : input_op.inputs(0).columns()) {
       // Set last used to first op so that all input ops are live to start
-      // with. We could eliminate input columns which aren't used, but this
-      // also requires modifying the samples.
+      // with. The client only lists (and samples) input columns which are
+      // consumed by some op, so there are no unused inputs to eliminate.
       intermediates[0].push_back(std::make_tuple(input_col, 1));
     }
   }
@@ -893,13 +893,14 @@ grpc::Status WorkerImpl::NewJob(grpc::ServerContext* context,
       analysis_results.column_mapping;
 
   // Read final output columns for use in post-evaluate worker
-  // (needed for determining column types)
+  // (needed for determining column types). The job holds all of them, even
+  // if tasks split their outputs over several tables.
   std::vector<Column> final_output_columns;
   {
-    std::string output_name =
-        job_params->task_set().tasks(0).output_table_name();
-    const TableMetadata& table = table_meta.at(output_name);
-    final_output_columns = table.columns();
+    JobMetadata job_meta = read_job_metadata(
+        storage_, JobMetadata::descriptor_path(
+                      meta.get_job_id(job_params->job_name())));
+    final_output_columns = job_meta.columns();
   }
   std::vector<ColumnCompressionOptions> final_compression_options;
   for (auto& opts : job_params->task_set().compression()) {
@@ -1216,8 +1217,8 @@ grpc::Status WorkerImpl::NewJob(grpc::ServerContext* context,
           node_id_, startup_lock, startup_cv, startup_count,
 
           // Per worker arguments
-          ki, kg, group, lc, dc, uo, cm, st, bt, eval_thread_profilers[kg + 1],
-          results[kg]});
+          ki, kg, group, lc, dc, uo, cm, st, bt, job_params->fused_rows(),
+          eval_thread_profilers[kg + 1], results[kg]});
       eval_total += 1;
     }
     // Pre evaluate worker
@@ -1338,6 +1339,13 @@ grpc::Status WorkerImpl::NewJob(grpc::ServerContext* context,
                    node_id_);
       break;
     }
+    if (job_cancelled(job_params->job_name())) {
+      // Drop the work items in flight without reporting them to the master
+      VLOG(1) << "Worker " << node_id_ << " received cancel while in NewJob";
+      RESULT_ERROR(job_result, "Worker %d cancelled job %s", node_id_,
+                   job_params->job_name().c_str());
+      break;
+    }
     // We batch up retired tasks to avoid sync overhead
     std::vector<std::tuple<i32, i64, i64>> batched_retired_tasks;
     while (retired_tasks.size() > 0) {
@@ -1559,6 +1567,8 @@ grpc::Status WorkerImpl::NewJob(grpc::ServerContext* context,
   }
 
   if (!job_result->success()) {
+    // Go back to idle so the worker can accept the next job
+    state_.test_and_set(RUNNING_JOB, IDLE);
     return grpc::Status::OK;
   }
 
@@ -1642,6 +1652,23 @@ grpc::Status WorkerImpl::NewJob(grpc::ServerContext* context,
   return grpc::Status::OK;
 }
 
+grpc::Status WorkerImpl::CancelJob(grpc::ServerContext* context,
+                                   const proto::JobId* job_id,
+                                   proto::Result* result) {
+  VLOG(1) << "Worker " << node_id_ << " received CancelJob";
+  {
+    std::unique_lock<std::mutex> lock(cancel_mutex_);
+    cancelled_job_ = job_id->job_name();
+  }
+  result->set_success(true);
+  return grpc::Status::OK;
+}
+
+bool WorkerImpl::job_cancelled(const std::string& job_name) {
+  std::unique_lock<std::mutex> lock(cancel_mutex_);
+  return cancelled_job_ == job_name;
+}
+
 grpc::Status WorkerImpl::LoadOp(grpc::ServerContext* context,
                                 const proto::OpPath* op_path,
                                 proto::Empty* empty) {
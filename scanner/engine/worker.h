@@ -22,6 +22,7 @@
 #include <grpc/grpc_posix.h>
 #include <grpc/support/log.h>
 #include <atomic>
+#include <mutex>
 #include <thread>
 #include <boost/python.hpp>
 
@@ -39,6 +40,9 @@ class WorkerImpl final : public proto::Worker::Service {
                       const proto::JobParameters* job_params,
                       proto::Result* job_result);
 
+  grpc::Status CancelJob(grpc::ServerContext* context,
+                         const proto::JobId* job_id, proto::Result* result);
+
   grpc::Status LoadOp(grpc::ServerContext* context,
                       const proto::OpPath* op_path, proto::Empty* empty);
 
@@ -68,6 +72,8 @@ class WorkerImpl final : public proto::Worker::Service {
  private:
   void try_unregister();
 
+  bool job_cancelled(const std::string& job_name);
+
   enum State {
     INITIALIZING,
     IDLE,
@@ -84,6 +90,9 @@ class WorkerImpl final : public proto::Worker::Service {
   storehouse::StorageConfig* storage_config_;
   DatabaseParameters db_params_;
   Flag trigger_shutdown_;
+  // Name of the most recently cancelled job
+  std::mutex cancel_mutex_;
+  std::string cancelled_job_;
   std::string master_address_;
   std::string worker_port_;
   i32 node_id_;
@@ -1,10 +1,11 @@
 from scannerpy import (
-    Database, Config, DeviceType, ColumnType, Job, ProtobufGenerator)
+    Database, Config, DeviceType, ColumnType, Job, ProtobufGenerator,
+    ScannerException)
 from scannerpy.stdlib import parsers
 import tempfile
 import toml
 import pytest
-from subprocess import check_call as run
+from subprocess import check_call as run, check_output
 from multiprocessing import Process, Queue
 import requests
 import imp
@@ -29,6 +30,9 @@ slow = pytest.mark.skipif(
 
 cwd = os.path.dirname(os.path.abspath(__file__))
 
+# Paths of the ingested test videos
+vid_paths = {}
+
 @slow
 def test_tutorial():
     def run_py(path):
@@ -102,6 +106,8 @@ def db():
              '00:00:10', '-c:v', 'libx264', '-strict', '-2', vid2_path])
 
         db.ingest_videos([('test1', vid1_path), ('test2', vid2_path)])
+        vid_paths['test1'] = vid1_path
+        vid_paths['test2'] = vid2_path
 
         yield db
 
@@ -130,6 +136,24 @@ def test_collection(db):
     db.run(job, show_progress=False, force=True)
     db.delete_collection('test')
 
+def test_collection_projection(db):
+    names = []
+    for i in range(2):
+        rows = [['unused', '{}_{}'.format(i, r)] for r in range(10)]
+        name = 'test_projection_{}'.format(i)
+        db.new_table(name, ['unused', 'val'], rows, force=True)
+        names.append(name)
+    c = db.new_collection('test_projection', names, force=True)
+    _, val = c.as_op().all()
+    job = Job(columns = [val], name = 'test_projection_out')
+    out = db.run(job, show_progress=False, force=True)
+    # Every table only loads the column the job uses
+    for i, t in enumerate(out.tables()):
+        assert [v[0] for _, v in t.load(['val'])] == \
+            ['{}_{}'.format(i, r) for r in range(10)]
+    db.delete_collection('test_projection_out')
+    db.delete_collection('test_projection')
+
 def test_summarize(db):
     db.summarize()
 
@@ -143,6 +167,24 @@ def test_load_video_column(db):
 def test_load_video_column(db):
     next(db.table('test1').load(['frame']))
 
+def test_load_video_column_decode(db):
+    rows = [0, 10, 100, 200]
+    frames = list(db.table('test1').columns('frame').load(rows=rows))
+    assert [i for i, _ in frames] == rows
+    assert frames[0][1].shape == (480, 640, 3)
+
+def test_load_video_column_png_dump(db):
+    column = db.table('test1').columns('frame')
+    list(column.load(rows=[0, 10], local_decode=False))
+    frames = list(column.load(rows=[10, 20], local_decode=False))
+    assert [i for i, _ in frames] == [10, 20]
+
+def test_load_rows(db):
+    rows = [[str(i)] for i in range(100)]
+    table = db.new_table('test_rows', ['val'], rows, force=True)
+    loaded = [(i, vals[0]) for i, vals in table.load(['val'], rows=[3, 50, 99])]
+    assert loaded == [(3, '3'), (50, '50'), (99, '99')]
+
 def test_profiler(db):
     frame = db.table('test1').as_op().all()
     job = Job(
@@ -225,6 +267,226 @@ def test_blur(db):
     assert frame_array.shape[1] == 640
     assert frame_array.shape[2] == 3
 
+def test_keyframes(db):
+    frame = db.table('test1').as_op().keyframes()
+    blurred_frame = db.ops.Blur(frame = frame, kernel_size = 3)
+    job = Job(columns = [blurred_frame], name = 'test_blur_keyframes')
+    table = db.run(job, force=True, show_progress=False)
+    positions, _ = db.table('test1').columns('frame')._keyframe_index(0)
+    assert table.num_rows() == len(positions) - 1
+
+def test_gop_aligned_gather(db):
+    rows = [200, 0, 10, 10, 100, 101]
+    frame = db.table('test1').as_op().gather(
+        rows, task_size=2, keyframe_column='frame')
+    blurred_frame = db.ops.Blur(frame = frame, kernel_size = 3)
+    job = Job(columns = [blurred_frame], name = 'test_blur_gop_gather')
+    table = db.run(job, force=True, show_progress=False)
+    assert table.num_rows() == len(set(rows))
+
+def test_time_sampling(db):
+    # Frame rate of the test video as reported by ffprobe, e.g. '24000/1001'
+    rate = check_output(
+        ['ffprobe', '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=avg_frame_rate', '-of', 'csv=p=0',
+         vid_paths['test1']]).strip().split('/')
+    fps = float(rate[0]) / float(rate[1])
+    input_table = db.table('test1')
+    n = input_table.num_rows()
+
+    def run_sampler(sampler, name):
+        frame = sampler(input_table.as_op())
+        job = Job(columns = [db.ops.Histogram(frame = frame)], name = name)
+        table = db.run(job, force=True, show_progress=False)
+        return table.parent_rows()
+
+    # One frame per second is every round(fps)-th frame for integer rates
+    if abs(fps - round(fps)) < 1e-6:
+        assert run_sampler(lambda op: op.every(1), 'test_every') == \
+            range(0, n, int(round(fps)))
+
+    # Frames shown in [1s, 2s) at 2 frames per second are the ones shown at
+    # 1s and 1.5s
+    rows = run_sampler(lambda op: op.time_range(1, 2, fps=2),
+                       'test_time_range')
+    assert rows == [int(np.floor(fps)), int(np.floor(1.5 * fps))]
+
+def test_coarse_to_fine(db):
+    from scannerpy.stdlib import pipelines
+    input_table = db.table('test1')
+    table = pipelines.coarse_to_fine(
+        db, input_table, lambda frame: db.ops.Histogram(frame = frame),
+        'histogram', lambda a, b: 1.0, 0.0, 'test_coarse_to_fine',
+        stride=8, fn=parsers.histograms)
+    # Every interval scores above the threshold, so every row is computed
+    assert table.num_rows() == input_table.num_rows()
+
+def test_random_sampling(db):
+    def run_random(name):
+        frame = db.table('test1').as_op().random(0.1, seed=7)
+        blurred_frame = db.ops.Blur(frame = frame, kernel_size = 3)
+        job = Job(columns = [blurred_frame], name = name)
+        return db.run(job, force=True, show_progress=False).parent_rows()
+    rows = run_random('test_random_0')
+    assert rows == sorted(rows)
+    assert len(rows) == round(0.1 * db.table('test1').num_rows())
+    assert run_random('test_random_1') == rows
+
+    frame = db.table('test1').as_op().stratified(2, bucket_size=100)
+    blurred_frame = db.ops.Blur(frame = frame, kernel_size = 3)
+    job = Job(columns = [blurred_frame], name = 'test_stratified')
+    table = db.run(job, force=True, show_progress=False)
+    n = db.table('test1').num_rows()
+    assert table.num_rows() == sum(min(2, n - s) for s in range(0, n, 100))
+    # Seconds can not be converted into rows without a video column
+    frame = db.table('test1').as_op().stratified(2, bucket_seconds=1)
+    job = Job(columns = [db.ops.Histogram(frame = frame)],
+              name = 'test_stratified_seconds')
+    with pytest.raises(ScannerException):
+        db.run(job, force=True, show_progress=False)
+
+def test_run_async(db):
+    def make_job(name):
+        frame = db.table('test1').as_op().strided(4)
+        hist = db.ops.Histogram(frame = frame)
+        return Job(columns = [hist], name = name)
+    first = db.run_async(make_job('test_async_0'), force=True, show_progress=False)
+    second = db.run_async(make_job('test_async_1'), force=True, show_progress=False)
+    assert second.result().num_rows() == first.result().num_rows()
+    assert first.done() and second.done()
+    assert not first.cancel()
+
+def test_cancel(db):
+    def make_job(name):
+        frame = db.table('test1').as_op().all()
+        hist = db.ops.Histogram(frame = frame)
+        return Job(columns = [hist], name = name)
+    def make_long_job(name):
+        frame = db.table('test1').as_op().all()
+        blurred = db.ops.Blur(frame = frame, kernel_size = 15)
+        return Job(columns = [db.ops.Histogram(frame = blurred)], name = name)
+    # Jobs run in order of submission, so the second job is still queued
+    # behind the first one when it is cancelled
+    long_job = db.run_async(make_long_job('test_cancel_long'), force=True,
+                            show_progress=False)
+    job = db.run_async(make_job('test_cancel'), force=True, show_progress=False)
+    assert job.cancel()
+    with pytest.raises(ScannerException):
+        job.result()
+    assert not db.has_table('test_cancel')
+    long_job.result()
+    # Workers stay up, so the next job runs without restarting the cluster
+    table = db.run(make_job('test_after_cancel'), force=True, show_progress=False)
+    assert table.num_rows() == db.table('test1').num_rows()
+
+def test_reuse(db):
+    def run_hist(**kwargs):
+        frame = db.table('test1').as_op().strided(8)
+        hist = db.ops.Histogram(frame = frame)
+        job = Job(columns = [hist], name = 'test_reuse')
+        return db.run(job, force=True, show_progress=False, **kwargs)
+    table = run_hist()
+    # Same ops and inputs, so the existing output table is kept
+    assert run_hist(reuse=True).id() == table.id()
+    # force alone recomputes
+    assert run_hist().id() != table.id()
+
+def test_incremental(db):
+    [table], _ = db.ingest_videos(
+        [('test_append', vid_paths['test2'])], force=True)
+    n = table.num_rows()
+    def run_hist():
+        frame = db.table('test_append').as_op().all()
+        hist = db.ops.Histogram(frame = frame)
+        job = Job(columns = [hist], name = 'test_incremental')
+        return db.run(job, force=True, show_progress=False, incremental=True)
+    output = run_hist()
+    assert output.num_rows() == n
+    assert db.append_video('test_append', vid_paths['test2']).num_rows() == 2 * n
+    # Only the appended rows are computed and added to the same table
+    output2 = run_hist()
+    assert output2.id() == output.id()
+    assert output2.parent_rows() == list(range(2 * n))
+    # Different ops would append rows computed differently
+    frame = db.table('test_append').as_op().all()
+    blurred = db.ops.Blur(frame = frame, kernel_size = 3)
+    job = Job(columns = [db.ops.Histogram(frame = blurred)],
+              name = 'test_incremental')
+    with pytest.raises(ScannerException):
+        db.run(job, force=True, show_progress=False, incremental=True)
+
+def test_optimize_dag(db):
+    frame = db.table('test1').as_op().all()
+    blurred = db.ops.Blur(frame = frame, kernel_size = 3)
+    # Same rows, same op and args as above, so both are merged
+    frame2 = db.table('test1').as_op().all()
+    blurred2 = db.ops.Blur(frame = frame2, kernel_size = 3)
+    # Never reaches the output
+    db.ops.Histogram(frame = frame)
+    hist = db.ops.Histogram(frame = blurred2)
+    job = Job(columns = [blurred, hist], name = 'test_optimize_dag')
+    ops, task, _ = db._toposort(job)
+    assert sorted(op.name for op in ops) == \
+        ['Blur', 'Histogram', 'InputTable', 'OutputTable']
+    assert len(task.samples) == 1
+
+def test_fused_kernels(db):
+    def run_blur_hist(name, fused_rows):
+        frame = db.table('test1').as_op().strided(8)
+        blurred = db.ops.Blur(frame = frame, kernel_size = 3)
+        hist = db.ops.Histogram(frame = blurred)
+        job = Job(columns = [hist], name = name)
+        table = db.run(job, force=True, show_progress=False,
+                       fused_rows=fused_rows)
+        return [np.concatenate(h).tolist()
+                for _, h in table.load([1], parsers.histograms)]
+    assert run_blur_hist('test_fused_0', 0) == run_blur_hist('test_fused_1', 1)
+
+def test_shared_inputs(db):
+    def load(table):
+        return [np.concatenate(h).tolist()
+                for _, h in table.load([1], parsers.histograms)]
+
+    # Both jobs read the same rows, so they run as one task
+    frame = db.table('test1').as_op().strided(8)
+    hist = db.ops.Histogram(frame = frame)
+    frame2 = db.table('test1').as_op().strided(8)
+    blurred = db.ops.Blur(frame = frame2, kernel_size = 3)
+    blurred_hist = db.ops.Histogram(frame = blurred)
+    tables = db.run(
+        [Job(columns = [hist], name = 'test_shared_hist'),
+         Job(columns = [blurred_hist], name = 'test_shared_blur')],
+        force=True, show_progress=False)
+    assert [t.name() for t in tables] == \
+        ['test_shared_hist', 'test_shared_blur']
+    assert tables[0].num_rows() == tables[1].num_rows()
+    job_ids = [t._descriptor_proto().job_id for t in tables]
+    assert job_ids[0] == job_ids[1]
+    tables[0]._load_job()
+    job = tables[0]._job
+    assert len(job.tasks) == 1
+    assert [s.output_table_name for s in job.tasks[0].splits] == \
+        ['test_shared_blur']
+
+    frame = db.table('test1').as_op().strided(8)
+    hist = db.ops.Histogram(frame = frame)
+    alone = db.run(Job(columns = [hist], name = 'test_shared_alone'),
+                   force=True, show_progress=False)
+    assert load(tables[0]) == load(alone)
+    assert load(tables[0]) != load(tables[1])
+
+def test_load_array(db):
+    frame = db.table('test1').as_op().range(0, 30)
+    blurred_frame = db.ops.Blur(frame = frame, kernel_size = 3)
+    job = Job(columns = [blurred_frame], name = 'test_blur_array')
+    table = db.run(job, force=True, show_progress=False)
+    frames = table.load_array('frame')
+    assert frames.dtype == np.uint8
+    assert frames.shape == (30, 480, 640, 3)
+    out = np.empty((2, 480, 640, 3), dtype=np.uint8)
+    table.load_array('frame', rows=[0, 29], out=out)
+    assert (out[1] == frames[29]).all()
+
 def test_lossless(db):
     frame = db.table('test1').as_op().range(0, 30)
     blurred_frame = db.ops.Blur(frame = frame, kernel_size = 3, sigma = 0.1)
@@ -252,6 +514,36 @@ def test_save_mp4(db):
     table.columns('frame').save_mp4(f.name)
     run(['rm', '-rf', f.name])
 
+def test_export_segments(db):
+    frame = db.table('test1').as_op().range(0, 30, task_size=10)
+    blurred_frame = db.ops.Blur(frame = frame, kernel_size = 3, sigma = 0.1)
+    job = Job(columns = [blurred_frame], name = 'test_export_segments')
+    table = db.run(job, force=True, show_progress=False)
+    column = table.columns('frame')
+    d = tempfile.mkdtemp()
+    playlist = column.export_segments(d, segment_duration=1)
+    with open(playlist) as f:
+        lines = [l.strip() for l in f.readlines()]
+    assert lines[0] == '#EXTM3U'
+    assert lines[-1] == '#EXT-X-ENDLIST'
+    target = int(next(l for l in lines
+                      if l.startswith('#EXT-X-TARGETDURATION:')).split(':')[1])
+    durations = [float(l[len('#EXTINF:'):].rstrip(','))
+                 for l in lines if l.startswith('#EXTINF:')]
+    segments = [l for l in lines if l and not l.startswith('#')]
+
+    # Every segment but the last holds at least segment_duration seconds
+    fps = column._fps()
+    assert len(segments) == len(durations)
+    assert 1 <= len(segments) <= table.num_rows() // int(round(fps)) + 1
+    assert all(0 < t <= target for t in durations)
+    assert abs(sum(durations) - table.num_rows() / fps) < 1e-3
+    for name in segments:
+        path = os.path.join(d, name)
+        assert os.path.isfile(path)
+        assert os.path.getsize(path) > 0
+    run(['rm', '-rf', d])
+
 @pytest.fixture()
 def fault_db():
     # Create new config